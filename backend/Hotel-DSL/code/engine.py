@@ -0,0 +1,138 @@
+import heapq
+import random
+
+try:
+    import numpy as np
+except ImportError:  # 镜像中没有 numpy 时退回纯 Python 实现
+    np = None
+
+
+def has_numpy():
+    return np is not None
+
+
+# ---- NumPy 向量化实现 ----
+
+def generate_points_numpy(n, seed):
+    """一次性生成 n 个点，返回 (xs, ys, rng)"""
+    rng = np.random.default_rng(seed)
+    pts = rng.uniform(0, 100, size=(2, n))
+    return pts[0], pts[1], rng
+
+
+def top_k_numpy(xs, ys, query_x, query_y, k):
+    """批量计算平方距离，用 argpartition 做部分选择，只对前 k 个排序"""
+    d2 = (xs - query_x) ** 2 + (ys - query_y) ** 2
+    n = d2.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        idx = np.argpartition(d2, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(d2[idx], kind="stable")]
+
+
+def search_numpy(n, k, query_x, query_y, seed):
+    """返回 [((x, y), value), ...]，按距离升序"""
+    xs, ys, rng = generate_points_numpy(n, seed)
+    idx = top_k_numpy(xs, ys, query_x, query_y, k)
+    values = rng.uniform(0, 100, size=len(idx))
+    return [
+        ((float(xs[i]), float(ys[i])), float(v))
+        for i, v in zip(idx, values)
+    ]
+
+
+# 批量查询时距离矩阵 (查询数 x n) 的元素上限，超过则分块计算
+BATCH_MATRIX_LIMIT = 4_000_000
+
+
+def top_k_numpy_batch(xs, ys, queries, k):
+    """
+    queries: shape (q, 2)。返回 shape (q, k') 的下标矩阵，每行按距离升序。
+    """
+    n = xs.shape[0]
+    k = min(k, n)
+    q = queries.shape[0]
+    if k <= 0 or q == 0:
+        return np.empty((q, 0), dtype=np.intp)
+    step = max(1, BATCH_MATRIX_LIMIT // max(n, 1))
+    out = np.empty((q, k), dtype=np.intp)
+    for start in range(0, q, step):
+        block = queries[start:start + step]
+        d2 = (xs[None, :] - block[:, 0:1]) ** 2 + (ys[None, :] - block[:, 1:2]) ** 2
+        if k < n:
+            idx = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.broadcast_to(np.arange(n), d2.shape)
+        part = np.take_along_axis(d2, idx, axis=1)
+        order = np.argsort(part, axis=1, kind="stable")
+        out[start:start + step] = np.take_along_axis(idx, order, axis=1)
+    return out
+
+
+def search_batch_numpy(n, k, queries, seed):
+    """候选点只生成一次，所有查询共享；返回每个查询的 [((x, y), value), ...]"""
+    xs, ys, rng = generate_points_numpy(n, seed)
+    q = np.asarray(queries, dtype=float).reshape(-1, 2)
+    idx = top_k_numpy_batch(xs, ys, q, k)
+    values = rng.uniform(0, 100, size=idx.shape)
+    return [
+        [((float(xs[i]), float(ys[i])), float(v)) for i, v in zip(row, vals)]
+        for row, vals in zip(idx, values)
+    ]
+
+
+# ---- 纯 Python 实现（fallback） ----
+
+def generate_points_python(n, seed):
+    rnd = random.Random(seed)
+    points = [(rnd.uniform(0, 100), rnd.uniform(0, 100)) for _ in range(n)]
+    return points, rnd
+
+
+def top_k_python(points, query_x, query_y, k):
+    return heapq.nsmallest(
+        k, points,
+        key=lambda p: (p[0] - query_x) ** 2 + (p[1] - query_y) ** 2,
+    )
+
+
+def search_python(n, k, query_x, query_y, seed):
+    points, rnd = generate_points_python(n, seed)
+    nearest = top_k_python(points, query_x, query_y, k)
+    return [(point, rnd.uniform(0, 100)) for point in nearest]
+
+
+def search_batch_python(n, k, queries, seed):
+    points, rnd = generate_points_python(n, seed)
+    return [
+        [(point, rnd.uniform(0, 100)) for point in top_k_python(points, qx, qy, k)]
+        for qx, qy in queries
+    ]
+
+
+def _pick(engine):
+    if engine is None:
+        engine = "numpy" if has_numpy() else "python"
+    if engine == "numpy" and not has_numpy():
+        raise RuntimeError("numpy is not available")
+    return engine
+
+
+def search(n, k, query_x, query_y, seed, engine=None):
+    """
+    engine: "numpy" / "python" / None（自动，有 numpy 就用 numpy）
+    """
+    if _pick(engine) == "numpy":
+        return search_numpy(n, k, query_x, query_y, seed)
+    return search_python(n, k, query_x, query_y, seed)
+
+
+def search_batch(n, k, queries, seed, engine=None):
+    """queries: [[x, y], ...]，同一组候选点上回答所有查询"""
+    if _pick(engine) == "numpy":
+        return search_batch_numpy(n, k, queries, seed)
+    return search_batch_python(n, k, queries, seed)
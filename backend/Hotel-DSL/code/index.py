@@ -1,49 +1,49 @@
 from faasit_runtime import function, FaasitRuntime
 
-import random
 import uuid
 
+import engine
+
+def to_points(unique_id, nearest):
+    return [
+        {
+            "brand": unique_id,
+            "coords": point,
+            "value": value
+        }
+        for point, value in nearest
+    ]
+
 @function
 def hotelSearch(frt: FaasitRuntime):
     _in = frt.input()
 
     n = _in.get("n", 1000)
     k = _in.get("k", 10)
-    
-    unique_id = uuid.uuid4()
-    random.seed(unique_id)
-    points = []
-    for _ in range(n):
-        point = (
-            random.uniform(0, 100),  # x
-            random.uniform(0, 100)   # y
-        )
-        points.append(point)
-    
+
+    # 传入 seed 时复用同一组候选点（工作流分块调用时各块共享）
+    seed = _in.get("seed")
+    unique_id = uuid.UUID(seed) if seed else uuid.uuid4()
+
+    # 批量模式：queries = [[x, y], ...]，一次调用回答多个查询
+    queries = _in.get("queries")
+    if queries is not None:
+        batch = engine.search_batch(n, k, queries, unique_id.int, _in.get("engine"))
+        return frt.output({
+            "results": [
+                {"query": list(q), "points": to_points(unique_id, nearest)}
+                for q, nearest in zip(queries, batch)
+            ]
+        })
+
     query_x = _in.get("query_x", 10)
     query_y = _in.get("query_y", 20)
-    query = (query_x, query_y)
-    
-    def euclidean_distance(p1, p2):
-        return (p1[0]-p2[0])**2 + (p1[1]-p2[1])**2
-    
-    points_with_dist = [
-        (point, euclidean_distance(query, point))
-        for point in points
-    ]
-    points_with_dist.sort(key=lambda x: x[1])
 
-    nearest_points = [
-        {
-            "brand": unique_id,
-            "coords": point,
-            "value": random.uniform(0, 100) # value
-        }
-        for point, _ in points_with_dist[:k]
-    ]
+    # 默认使用 numpy 向量化引擎，可通过 engine="python" 强制走纯 Python 路径
+    nearest = engine.search(n, k, query_x, query_y, unique_id.int, _in.get("engine"))
 
     return frt.output({
-        "points": nearest_points
+        "points": to_points(unique_id, nearest)
     })
 
-handler = hotelSearch.export()
\ No newline at end of file
+handler = hotelSearch.export()
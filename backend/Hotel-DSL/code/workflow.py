@@ -1,11 +1,32 @@
 from faasit_runtime import workflow, Workflow
 
+import uuid
+
+# 每个 stage0 调用处理的查询点数
+CHUNK_SIZE = 100
+
 
 @workflow
 def hotelworkflow(wf: Workflow):
-    s0 = wf.call('stage0-0', {
-    })
-    return s0
+    _in = wf.input()
+    queries = _in.get("queries")
+    if not queries:
+        s0 = wf.call('stage0-0', {
+        })
+        return s0
 
-hotelworkflow = hotelworkflow.export()
+    # 批量查询：按 chunk_size 切块，分发到多个 stage0 调用；
+    # 所有块使用同一个 seed，从而在同一组候选点上查询
+    chunk_size = _in.get("chunk_size", CHUNK_SIZE)
+    params = {key: _in[key] for key in ("n", "k", "engine") if key in _in}
+    params["seed"] = str(uuid.uuid4())
 
+    chunks = []
+    for start in range(0, len(queries), chunk_size):
+        chunks.append(wf.call('stage0-0', dict(
+            params,
+            queries=queries[start:start + chunk_size],
+        )))
+    return {"chunks": chunks}
+
+hotelworkflow = hotelworkflow.export()
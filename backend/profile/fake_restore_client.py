@@ -0,0 +1,86 @@
+"""
+mitosis client.py 的本地替身，供离线基准测试使用。
+
+    python fake_restore_client.py restore --restore_mode parallel --restore_num 100 --output_dir /tmp/mitosis
+
+按恢复模式模拟实例逐个恢复完成：每完成一个实例向 restore.log 追加一个 JSON 对象，
+结束后写出与真实 plot.log 相同格式的 "Plot Info: x: [...], y: [...]"。
+默认参数大致对应 mitosis_log 中两次实测（顺序约 31ms/实例，并行约 85ms 完成 100 个）。
+"""
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+
+
+def restore_times(mode, num, per_instance_ms, workers, rng):
+    """返回每个实例的完成时间（毫秒，升序）"""
+    if mode == "sequential":
+        t, out = 0.0, []
+        for _ in range(num):
+            t += per_instance_ms * rng.uniform(0.6, 1.4)
+            out.append(t)
+        return out
+    # 并行：workers 个恢复槽，每个实例耗时较短但有抖动
+    slots = [0.0] * workers
+    out = []
+    for _ in range(num):
+        i = min(range(workers), key=slots.__getitem__)
+        slots[i] += per_instance_ms * rng.uniform(0.6, 1.4)
+        out.append(slots[i])
+    return sorted(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["restore"])
+    parser.add_argument("--restore_mode", default="parallel")
+    parser.add_argument("--restore_num", type=int, default=100)
+    parser.add_argument("--output_dir", default="/etc/mitosis")
+    parser.add_argument("--seq_ms", type=float, default=31.0, help="顺序模式下单个实例的恢复耗时")
+    parser.add_argument("--para_ms", type=float, default=13.0, help="并行模式下单个实例的恢复耗时")
+    parser.add_argument("--workers", type=int, default=16, help="并行模式的恢复槽数")
+    parser.add_argument("--time_scale", type=float, default=1.0, help="真实等待时间 = 模拟时间 * time_scale")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    per = args.seq_ms if args.restore_mode == "sequential" else args.para_ms
+    times = restore_times(args.restore_mode, args.restore_num, per, args.workers, rng)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    restore_log = os.path.join(args.output_dir, "restore.log")
+    plot_log = os.path.join(args.output_dir, "plot.log")
+
+    start = time.monotonic()
+    xs, ys = [], []
+    with open(restore_log, "w", encoding="utf-8") as f:
+        for i, t in enumerate(times, start=1):
+            wait = start + t / 1000 * args.time_scale - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            f.write(json.dumps({"points": [{
+                "brand": str(uuid.uuid4()),
+                "coords": [rng.uniform(0, 100), rng.uniform(0, 100)],
+                "value": rng.uniform(0, 100),
+            }]}))
+            f.flush()
+            x = round(t)
+            y = round(i * 100 / args.restore_num)
+            if xs and xs[-1] == x:
+                ys[-1] = y
+            else:
+                xs.append(x)
+                ys.append(y)
+
+    # x 从第一个实例完成时刻开始计，与真实 plot.log 一致
+    x0 = xs[0] if xs else 0
+    xs = [x - x0 for x in xs]
+    with open(plot_log, "w", encoding="utf-8") as f:
+        f.write(f"Plot Info: x: {xs}, y: {ys}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+根据 profile 结果挑选满足延迟 SLO 的最便宜 vCPU 配置。
+
+延迟模型：latency(v) = a + b / v，v 为 vCPU 数
+成本沿用 profile.py 的口径：cost = v * latency / 30
+profile.py 只测整数核，provider 也只接受整数核，因此候选默认按整数核枚举。
+
+    python optimizer.py --slo 0.15
+    python optimizer.py --slo 0.15 --write-ft ../Hotel-DSL/main.ft
+"""
+import argparse
+import json
+import math
+import os
+import re
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def config_vcpu(config):
+    """config 形如 1-3000-0（第二段为毫核），返回 vCPU 数 3.0"""
+    return int(config.split("-")[1]) / 1000
+
+
+def load_profile(path, metric="latency", restore_num=100, restore_mode="parallel"):
+    """
+    返回 [(vcpu, latency), ...]；同一 vCPU 有多条记录时取平均。
+    只使用指定 restore_num/restore_mode 的记录（不同恢复规模和模式的延迟不能混在一起拟合）；
+    没有这两个字段的旧记录按 profile.py 的默认值（100, parallel）处理。
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    by_vcpu = {}
+    for e in entries:
+        if e.get(metric) is None:
+            continue
+        if e.get("restore_num", 100) != restore_num or e.get("restore_mode", "parallel") != restore_mode:
+            continue
+        by_vcpu.setdefault(config_vcpu(e["config"]), []).append(e[metric])
+    if not by_vcpu:
+        raise ValueError(f"{path} 中没有 restore_num={restore_num} restore_mode={restore_mode} 的 {metric} 记录")
+    return sorted((v, sum(ls) / len(ls)) for v, ls in by_vcpu.items())
+
+
+class LatencyModel:
+    def __init__(self, a, b, vcpu_range):
+        self.a = a
+        self.b = b
+        self.vcpu_range = vcpu_range    # 有测量数据的 vCPU 范围，不向外外推
+
+    @classmethod
+    def fit(cls, points):
+        """对 latency = a + b * (1/v) 做最小二乘"""
+        if len(points) < 2:
+            raise ValueError("至少需要两个不同 vCPU 的 profile 结果")
+        xs = [1 / v for v, _ in points]
+        ys = [lat for _, lat in points]
+        mx = sum(xs) / len(xs)
+        my = sum(ys) / len(ys)
+        sxx = sum((x - mx) ** 2 for x in xs)
+        sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+        b = sxy / sxx
+        a = my - b * mx
+        vcpus = [v for v, _ in points]
+        return cls(a, b, (min(vcpus), max(vcpus)))
+
+    def latency(self, vcpu):
+        return self.a + self.b / vcpu
+
+    def cost(self, vcpu):
+        return vcpu * self.latency(vcpu) / 30
+
+
+def recommend(model, slo, step=1.0):
+    """
+    在有数据的 vCPU 范围内按 step 枚举（默认整数核，从不小于下限的第一个 step 倍数开始），
+    返回满足 latency <= slo 的最便宜配置；都不满足时返回延迟最低的配置，并标记 meets_slo=False。
+    """
+    lo, hi = model.vcpu_range
+    candidates = []
+    v = math.ceil(lo / step - 1e-9) * step
+    while v <= hi + 1e-9:
+        candidates.append(round(v, 4))
+        v += step
+
+    rows = [
+        {
+            "vcpu": v,
+            "millicores": int(round(v * 1000)),
+            "latency": model.latency(v),
+            "cost": model.cost(v),
+        }
+        for v in candidates
+    ]
+    ok = [r for r in rows if r["latency"] <= slo]
+    if ok:
+        best = min(ok, key=lambda r: (r["cost"], r["vcpu"]))
+        best["meets_slo"] = True
+    else:
+        best = min(rows, key=lambda r: r["latency"])
+        best["meets_slo"] = False
+    best["config"] = f"1-{best['millicores']}-0"
+    best["slo"] = slo
+    return best
+
+
+def write_ft(path, millicores):
+    """把推荐值写回 main.ft：stage0 的 resource.vcpu 与各 provider 的 invoke.vcpu"""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    content = re.sub(r"(vcpu\s*=\s*)\d+", rf"\g<1>{millicores}", content)
+    # provider 中的 vcpu 为整数核数字符串；向上取整，不能低于推荐值
+    cores = max(1, math.ceil(millicores / 1000))
+    content = re.sub(r'(vcpu\s*=\s*)"\d+"', rf'\g<1>"{cores}"', content)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按延迟 SLO 选择最便宜的 vCPU 配置")
+    parser.add_argument("--profile", default=os.path.join(HERE, "hotel_reservation.json"))
+    parser.add_argument("--slo", type=float, required=True, help="延迟目标（秒）")
+    parser.add_argument("--metric", default="latency", help="使用的延迟指标，如 latency / latency_p95")
+    parser.add_argument("--restore-num", type=int, default=100, help="只使用该 restore_num 的 profile 记录")
+    parser.add_argument("--restore-mode", default="parallel", help="只使用该 restore_mode 的 profile 记录")
+    parser.add_argument("--step", type=float, default=1.0,
+                        help="候选 vCPU 的步长；默认整数核，与 profile 的测量点和 provider 一致")
+    parser.add_argument("--output", help="把推荐结果写入该 JSON 文件")
+    parser.add_argument("--write-ft", help="把推荐的 vCPU 写回该 main.ft")
+    args = parser.parse_args()
+
+    model = LatencyModel.fit(load_profile(args.profile, args.metric, args.restore_num, args.restore_mode))
+    print(f"拟合结果: latency = {model.a:.6f} + {model.b:.6f} / vcpu")
+    best = recommend(model, args.slo, args.step)
+
+    if best["meets_slo"]:
+        print(f"推荐配置 {best['config']}: 预测延迟 {best['latency']:.6f}秒, 成本 {best['cost']:.6f}")
+    else:
+        print(f"没有配置能满足 SLO {args.slo}秒，延迟最低的是 {best['config']} ({best['latency']:.6f}秒)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(best, f, indent=2, ensure_ascii=False)
+        print(f"结果已保存到 {args.output}")
+    if args.write_ft:
+        if not best["meets_slo"]:
+            print("未满足 SLO，不修改 main.ft")
+        else:
+            write_ft(args.write_ft, best["millicores"])
+            print(f"已更新 {args.write_ft}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,61 @@
+import argparse
+import itertools
 import subprocess
+import statistics
 import time
 import json
-import re
+import os
+import sys
 
-def run_command(vcpu):
-    """运行指定VCPU的命令并返回执行时间"""
+# 日志解析与 mock_api 共用同一个流式读取模块
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mock_api"))
+from logreader import read_plot_log
+from proclock import ProcessLock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PLOT_LOG = '/etc/mitosis/plot.log'
+APP = "hotelsearchv3"
+
+# mitosis 把结果写到本机固定的 plot.log，同时运行的恢复还会互相抢 CPU、拉高延迟：
+# 从启动恢复到读完 plot.log 全程持锁。与 mock_api 共用同一个锁文件，
+# 同一台机器上 profile 和线上恢复也不会互相覆盖结果
+MITOSIS_LOCK = os.environ.get("MITOSIS_LOCK", "/tmp/mitosis-restore.lock")
+_restore_lock = ProcessLock(MITOSIS_LOCK)
+
+
+def run_command(vcpu, restore_num=100, restore_mode="parallel"):
+    """运行指定配置的恢复命令并返回延迟（毫秒），失败返回 None"""
     command = [
         "/root/faasit/demo-202405/venv/bin/python", "-m", "serverless_framework.controller", "mitosis", "restore",
-        "--restore_mode", "parallel",
-        "--restore_num", "100",
+        "--restore_mode", restore_mode,
+        "--restore_num", str(restore_num),
         "--vcpu", str(vcpu)
     ]
-    
-    start_time = time.time()
-    result = subprocess.run(command, text=True)
 
     try:
-        with open('/etc/mitosis/plot.log', 'r') as file:
-            content = file.read()
-        
-        # 使用正则表达式匹配x数组
-        pattern = r'x:\s*\[([^\]]+)\]'
-        match = re.search(pattern, content)
-        
-        if match:
-            x_values_str = match.group(1)
-            # 将字符串转换为整数列表
-            x_values = [int(x.strip()) for x in x_values_str.split(',')]
-            
-            if x_values:
-                # 返回最后一个x值作为延迟
-                latency = x_values[-1]
-                return latency
-            else:
-                print(f"VCPU={vcpu}: 未找到有效的x值")
+        with _restore_lock:
+            start_time = time.time()
+            result = subprocess.run(command, text=True)
+            if result.returncode != 0:
+                print(f"VCPU={vcpu}: 恢复命令返回码 {result.returncode}")
                 return None
+            if os.path.getmtime(PLOT_LOG) < start_time:
+                print(f"VCPU={vcpu}: plot.log 未被本次运行更新")
+                return None
+            # 流式解析x数组
+            x_values, _, _ = read_plot_log(PLOT_LOG)
+
+        if x_values:
+            # 返回最后一个x值作为延迟
+            latency = x_values[-1]
+            return latency
         else:
-            print(f"VCPU={vcpu}: 未找到x数组")
+            print(f"VCPU={vcpu}: 未找到有效的x值")
             return None
-            
+
+    except ValueError:
+        print(f"VCPU={vcpu}: 未找到x数组")
+        return None
     except FileNotFoundError:
         print(f"VCPU={vcpu}: plot.log文件未找到")
         return None
@@ -46,33 +63,138 @@ def run_command(vcpu):
         print(f"VCPU={vcpu}: 读取plot.log时发生错误: {e}")
         return None
 
-def main():
-    results = []
-    
-    for vcpu in [1, 2, 3, 4, 5]:
-        print(f"正在测试 VCPU={vcpu}...")
-        latency = run_command(vcpu)*0.001
-        
-        if latency is not None:
-            cost = (vcpu * latency) / 30
-            
-            result = {
-                "app": "hotelsearchv3",
-                "config": f"1-{vcpu*1000}-0",
-                "latency": latency,
-                "cost": cost,
-                "profile": ""
-            }
-            results.append(result)
-            print(f"VCPU={vcpu} 测试完成, 延迟: {latency:.6f}秒")
+
+def percentile(sorted_values, p):
+    """最近秩百分位数"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def point_key(vcpu, restore_num, restore_mode):
+    return f"{vcpu}-{restore_num}-{restore_mode}"
+
+
+def profile_point(vcpu, restore_num, restore_mode, repeats, cooldown):
+    """对一个配置点重复运行 repeats 次，返回汇总结果"""
+    latencies = []
+    failures = 0
+    for i in range(repeats):
+        latency_ms = run_command(vcpu, restore_num, restore_mode)
+        if latency_ms is None:
+            failures += 1
         else:
-            print(f"VCPU={vcpu} 测试失败")
-        time.sleep(0.1)
-    
+            latencies.append(latency_ms * 0.001)
+        if i + 1 < repeats:
+            time.sleep(cooldown)
+
+    result = {
+        "app": APP,
+        "config": f"1-{vcpu*1000}-0",
+        "restore_num": restore_num,
+        "restore_mode": restore_mode,
+        "runs": repeats,
+        "failures": failures,
+        "samples": latencies,
+        "profile": "",
+    }
+    if latencies:
+        s = sorted(latencies)
+        costs = sorted((vcpu * latency) / 30 for latency in s)
+        result.update({
+            "latency": statistics.mean(s),
+            "latency_p50": percentile(s, 50),
+            "latency_p95": percentile(s, 95),
+            "cost": statistics.mean(costs),
+            "cost_p50": percentile(costs, 50),
+            "cost_p95": percentile(costs, 95),
+        })
+    return result
+
+
+def load_checkpoint(path):
+    """
+    读取已完成的配置点（JSON Lines，每行一个点）。
+    没有任何一次成功（没有 latency）的点不算完成，重新运行时会再测一次。
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 中断时写了一半的行
+            if "latency" in entry["result"]:
+                done[entry["key"]] = entry["result"]
+    return done
+
+
+def sweep(vcpus, restore_nums, restore_modes, repeats=3,
+          checkpoint="profile_checkpoint.jsonl", cooldown=0.1):
+    """
+    逐个扫描 vcpu x restore_num x restore_mode 网格。
+    扫描是串行的：每次恢复都独占主机（见 run_command 中的 _restore_lock），并行运行配置点只会排队。
+    每完成一个有成功结果的点就追加写入 checkpoint，中断后重新运行会跳过这些点；
+    全部失败的点不写入，下次运行重试。
+    """
+    done = load_checkpoint(checkpoint)
+    grid = list(itertools.product(vcpus, restore_nums, restore_modes))
+    points = [p for p in grid if point_key(*p) not in done]
+    if done:
+        print(f"从 {checkpoint} 恢复：已完成 {len(done)} 个点，剩余 {len(points)} 个")
+
+    for point in points:
+        vcpu, restore_num, restore_mode = point
+        print(f"正在测试 VCPU={vcpu} restore_num={restore_num} mode={restore_mode}...")
+        result = profile_point(*point, repeats, cooldown)
+        key = point_key(*point)
+        if "latency" not in result:
+            print(f"{key} 测试失败，未写入 checkpoint")
+            continue
+        done[key] = result
+        with open(checkpoint, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "result": result}, ensure_ascii=False) + "\n")
+        print(f"{key} 测试完成, 平均延迟: {result['latency']:.6f}秒, "
+              f"p95: {result['latency_p95']:.6f}秒, 失败 {result['failures']} 次")
+
+    order = {point_key(*p): i for i, p in enumerate(grid)}
+    return [done[k] for k in sorted(done, key=lambda k: order.get(k, len(order)))]
+
+
+def parse_list(value, cast=str):
+    return [cast(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="hotelsearchv3 恢复延迟/成本扫描")
+    parser.add_argument("--vcpus", default="1,2,3,4,5")
+    parser.add_argument("--restore-nums", default="100")
+    parser.add_argument("--restore-modes", default="parallel")
+    parser.add_argument("--repeats", type=int, default=3, help="每个配置点的重复次数")
+    parser.add_argument("--cooldown", type=float, default=0.1, help="同一配置点两次运行之间的间隔（秒）")
+    parser.add_argument("--checkpoint", default=os.path.join(HERE, "profile_checkpoint.jsonl"))
+    parser.add_argument("--output", default=os.path.join(HERE, "hotel_reservation.json"))
+    args = parser.parse_args()
+
+    results = sweep(
+        parse_list(args.vcpus, int),
+        parse_list(args.restore_nums, int),
+        parse_list(args.restore_modes),
+        repeats=args.repeats,
+        checkpoint=args.checkpoint,
+        cooldown=args.cooldown,
+    )
+
     # 输出JSON格式结果到文件
-    with open('results.json', 'w', encoding='utf-8') as f:
+    with open(args.output, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
-    print("结果已保存到 results.json")
+    print(f"结果已保存到 {args.output}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
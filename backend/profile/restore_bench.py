@@ -0,0 +1,204 @@
+"""
+恢复模式基准：顺序 vs 并行，在多个 restore_num 下重复运行，输出 JSON 结果。
+
+    python restore_bench.py                                   # 默认使用本地替身 client，完全离线
+    python restore_bench.py --restore-nums 10,100,500 --repeats 5 --output bench.json
+    python restore_bench.py --baseline last_build.json        # 与上次结果比较，退化则返回非零
+
+指标（毫秒，均从启动 client 开始计时）：
+    ttfi   第一个实例恢复完成（restore.log 出现第一个对象）
+    t50    50% 实例恢复完成
+    t100   全部实例恢复完成
+以及吞吐量 instances_per_sec = restore_num / t100。
+plot.log 的 x 从第一个实例完成时刻算起，因此 t50/t100 = ttfi + plot 中对应的 x。
+"""
+import argparse
+import json
+import os
+import platform
+import shlex
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mock_api"))
+from logreader import JsonStreamTail, read_plot_log
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+FAKE_CLIENT = (
+    f"{shlex.quote(sys.executable)} {shlex.quote(os.path.join(HERE, 'fake_restore_client.py'))} "
+    "restore --restore_mode {mode} --restore_num {num} --output_dir {output_dir}"
+)
+REAL_CLIENT = (
+    "cd ~/faststart/mitosis_app && source ../venv/bin/activate && "
+    "python ./client.py restore --restore_mode {mode} --restore_num {num}"
+)
+POLL_INTERVAL = 0.002
+METRICS = ("ttfi_ms", "t50_ms", "t100_ms", "instances_per_sec")
+
+
+def first_x_at(xs, ys, percent):
+    for x, y in zip(xs, ys):
+        if y >= percent:
+            return x
+    return None
+
+
+def run_once(command, output_dir, num, timeout):
+    """运行一次恢复，返回指标 dict；失败时返回 {"error": ...}"""
+    for name in ("plot.log", "restore.log"):
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except FileNotFoundError:
+            pass
+
+    tail = JsonStreamTail(os.path.join(output_dir, "restore.log"))
+    # stderr 写到临时文件：运行期间不读取，管道写满会让 client 卡住直到超时。
+    # 新建进程组，超时时连同 bash 启动的 client 一起结束
+    with tempfile.TemporaryFile() as stderr:
+        start = time.monotonic()
+        proc = subprocess.Popen(command, shell=True, executable="/bin/bash",
+                                stdout=subprocess.DEVNULL, stderr=stderr, start_new_session=True)
+        ttfi = None
+        while True:
+            exited = proc.poll() is not None
+            if ttfi is None and tail.poll():
+                ttfi = (time.monotonic() - start) * 1000
+            if exited:
+                break
+            if time.monotonic() - start > timeout:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                proc.wait()
+                return {"error": "timeout"}
+            time.sleep(POLL_INTERVAL)
+        wall = (time.monotonic() - start) * 1000
+
+        if proc.returncode != 0:
+            stderr.seek(max(0, stderr.seek(0, os.SEEK_END) - 500))
+            return {"error": f"exit code {proc.returncode}: {stderr.read().decode(errors='replace')}"}
+    try:
+        xs, ys, _ = read_plot_log(os.path.join(output_dir, "plot.log"))
+    except (OSError, ValueError) as e:
+        return {"error": f"plot.log: {e}"}
+    if ttfi is None:
+        # restore.log 一次性写出，无法观测首个实例，用总耗时减去曲线跨度估计
+        ttfi = wall - (xs[-1] if xs else 0)
+
+    t50 = first_x_at(xs, ys, 50)
+    t100 = first_x_at(xs, ys, 100)
+    result = {
+        "ttfi_ms": ttfi,
+        "t50_ms": None if t50 is None else ttfi + t50,
+        "t100_ms": None if t100 is None else ttfi + t100,
+        "wall_ms": wall,
+    }
+    result["instances_per_sec"] = (
+        num / (result["t100_ms"] / 1000) if result["t100_ms"] else None
+    )
+    return result
+
+
+def summarize(runs):
+    ok = [r for r in runs if "error" not in r]
+    summary = {"runs": len(runs), "failures": len(runs) - len(ok)}
+    for m in METRICS:
+        values = sorted(r[m] for r in ok if r.get(m) is not None)
+        if values:
+            summary[m] = {
+                "median": statistics.median(values),
+                "min": values[0],
+                "max": values[-1],
+            }
+    return summary
+
+
+def compare(current, baseline, tolerance):
+    """返回退化项列表：时间类指标中位数变大、吞吐变小超过 tolerance"""
+    base = {(c["restore_mode"], c["restore_num"]): c["summary"] for c in baseline["results"]}
+    regressions = []
+    for c in current["results"]:
+        old = base.get((c["restore_mode"], c["restore_num"]))
+        if old is None:
+            continue
+        for m in METRICS:
+            if m not in c["summary"] or m not in old:
+                continue
+            new_v, old_v = c["summary"][m]["median"], old[m]["median"]
+            if old_v == 0:
+                continue
+            change = (new_v - old_v) / old_v
+            worse = change < -tolerance if m == "instances_per_sec" else change > tolerance
+            if worse:
+                regressions.append({
+                    "restore_mode": c["restore_mode"], "restore_num": c["restore_num"],
+                    "metric": m, "baseline": old_v, "current": new_v, "change": change,
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="顺序/并行恢复基准")
+    parser.add_argument("--modes", default="sequential,parallel")
+    parser.add_argument("--restore-nums", default="10,100")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--client", choices=["fake", "real"], default="fake")
+    parser.add_argument("--command", help="自定义 client 命令模板，可用 {mode} {num} {output_dir}")
+    parser.add_argument("--output-dir", default=None,
+                        help="client 输出 plot.log/restore.log 的目录（real 默认为 /etc/mitosis）")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", default=os.path.join(HERE, "restore_bench.json"))
+    parser.add_argument("--baseline", help="上一次的结果文件，用于检测退化")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的相对退化")
+    args = parser.parse_args()
+
+    template = args.command or (REAL_CLIENT if args.client == "real" else FAKE_CLIENT)
+    output_dir = args.output_dir or ("/etc/mitosis" if args.client == "real" else "/tmp/restore_bench")
+    os.makedirs(output_dir, exist_ok=True)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "client": "custom" if args.command else args.client,
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "results": [],
+    }
+    for mode in [m for m in args.modes.split(",") if m]:
+        for num in [int(n) for n in args.restore_nums.split(",") if n]:
+            command = template.format(mode=mode, num=num, output_dir=shlex.quote(output_dir))
+            runs = [run_once(command, output_dir, num, args.timeout) for _ in range(args.repeats)]
+            summary = summarize(runs)
+            report["results"].append({
+                "restore_mode": mode, "restore_num": num, "summary": summary, "runs": runs,
+            })
+            line = f"{mode:<10} n={num:<5}"
+            for m in METRICS:
+                if m in summary:
+                    line += f"  {m} {summary[m]['median']:.1f}"
+            if summary["failures"]:
+                line += f"  失败 {summary['failures']} 次"
+            print(line)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"结果已保存到 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"退化: {r['restore_mode']} n={r['restore_num']} {r['metric']} "
+                  f"{r['baseline']:.1f} -> {r['current']:.1f} ({r['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
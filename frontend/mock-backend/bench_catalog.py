@@ -0,0 +1,61 @@
+"""
+目录加载耗时：文本 hotels.txt vs 二进制 hotels.bin（mmap）。
+
+    python bench_catalog.py --sizes 1000,100000,10000000
+
+对每个规模生成一份目录，分别记录：
+    load   读取列数据的耗时（二进制为 mmap，几乎为常数）
+    ready  load + 构建 CatalogSnapshot（含网格索引）的耗时，即服务能开始搜索所需的时间
+    top10  就绪后第一次查询最近 10 家并取出整行的耗时
+生成 1000 万行的文本目录约需数 GB 临时空间和几分钟。
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from catalog import CatalogSnapshot
+from gen import generate_rows, write_text
+from hotel_store import HotelColumns
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def bench(n, workdir):
+    random.seed(n)
+    txt = os.path.join(workdir, f"hotels-{n}.txt")
+    bin_ = os.path.join(workdir, f"hotels-{n}.bin")
+    write_text(generate_rows(n), txt)
+    HotelColumns.from_text(txt).save(bin_)
+
+    rows = {}
+    for name, path, load in (("text", txt, HotelColumns.from_text),
+                             ("binary", bin_, HotelColumns.load)):
+        columns, load_ms = timed(lambda: load(path))
+        snap, snap_ms = timed(lambda: CatalogSnapshot(columns, 0, 0))
+        _, touch_ms = timed(lambda: [columns.row(i) for _, i in snap.index.nearest(50.0, 50.0, 10)])
+        rows[name] = (load_ms, load_ms + snap_ms, touch_ms, os.path.getsize(path))
+        del columns, snap
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,100000,10000000")
+    parser.add_argument("--workdir", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        print(f"{'rows':>10} {'format':>7} {'load ms':>10} {'ready ms':>10} {'top10 ms':>9} {'size MB':>8}")
+        for n in [int(s) for s in args.sizes.split(",") if s]:
+            for name, (load_ms, ready_ms, touch_ms, size) in bench(n, workdir).items():
+                print(f"{n:>10} {name:>7} {load_ms:>10.2f} {ready_ms:>10.2f} {touch_ms:>9.3f} {size / 2**20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,52 @@
+import os
+from booking import BookingEngine, BookingError, IdempotencyConflict, SoldOut
+from find_hotels import catalog
+from storage import default_store
+
+# 库存放在 STORE_BACKEND 指定的 store 中：memory 为进程内，redis 为多实例共享
+BOOKING_ROOMS = int(os.environ.get("BOOKING_ROOMS", "20"))
+engine = BookingEngine(default_store(), rooms_per_hotel=BOOKING_ROOMS)
+
 def handler(event, context=None):
     """
-    event = {"hotel_name": "Hilton Hotel #12"}
+    event = {"hotel_id": "3f2a...", "rooms": 1, "idempotency_key": "..."}
+    或批量：{"items": [{"hotel_id": "3f2a...", "rooms": 2}, ...], "idempotency_key": "..."}
+    hotel_id 为搜索结果中的 id（HotelColumns.key），目录重新加载后仍指向同一家酒店。
+    批量请求要么全部订上，要么一间都不订。
     """
-    hotel_name = event.get("hotel_name")
-    if not hotel_name:
-        return {"status": "error", "message": "hotel_name missing"}
-    
-    # 模拟成功预定
-    print(f"✅ Booking confirmed for {hotel_name}")
+    if "items" in event:
+        items = [(it.get("hotel_id"), it.get("rooms", 1)) for it in event["items"]]
+    else:
+        items = [(event.get("hotel_id"), event.get("rooms", 1))]
+
+    snap = catalog.snapshot()
+    rows = {}   # 稳定标识 -> 当前快照中的行号
+    for hotel_id, _ in items:
+        row = snap.find(hotel_id) if isinstance(hotel_id, str) else None
+        if row is None:
+            return {"status": "error", "message": f"unknown hotel_id: {hotel_id}"}
+        rows[hotel_id] = row
+
+    try:
+        booked = engine.reserve(items, event.get("idempotency_key"))
+    except SoldOut as e:
+        return {"status": "sold_out", "message": str(e)}
+    except IdempotencyConflict as e:
+        return {"status": "conflict", "message": str(e)}
+    except BookingError as e:
+        return {"status": "error", "message": str(e)}
+
     return {
         "status": "success",
-        "hotel_name": hotel_name,
-        "confirmation_id": f"CONF-{hash(hotel_name) % 1000000}"
+        "bookings": [dict(b, hotel_name=snap.columns.name(rows[b["hotel_id"]])) for b in booked],
     }
 
 # 测试用
 if __name__ == "__main__":
-    print(handler({"hotel_name": "Hilton Hotel #12"}))
+    columns = catalog.snapshot().columns
+    a, b = columns.key(12), columns.key(3)
+    print(handler({"hotel_id": a}))
+    print(handler({"items": [{"hotel_id": a, "rooms": 2}, {"hotel_id": b}], "idempotency_key": "demo"}))
+    print(handler({"items": [{"hotel_id": a, "rooms": 2}, {"hotel_id": b}], "idempotency_key": "demo"}))
+    print(handler({"hotel_id": b, "rooms": 100}))
+    print(handler({"hotel_id": 12}))
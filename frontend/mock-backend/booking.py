@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+
+from storage import MemoryStore
+
+
+class BookingError(ValueError):
+    """预订失败的基类"""
+
+
+class SoldOut(BookingError):
+    """酒店剩余房间不足；hotels 为房间不够的酒店"""
+
+    def __init__(self, hotels):
+        super().__init__(f"not enough rooms left in hotel {', '.join(map(str, hotels))}")
+        self.hotels = hotels
+
+
+class IdempotencyConflict(BookingError):
+    """同一个幂等键被用于内容不同的请求"""
+
+
+def confirmation_id(epoch, hotel_id, slot):
+    """
+    确认号由库存计数器的纪元、酒店编号和该酒店内的房间序号组成：确定且不会重复。
+    纪元和计数器一起保存在 store 中（见 MemoryStore.reserve），计数器丢失后重新发放的序号会带上新纪元。
+    """
+    return f"CONF-{epoch}-{hotel_id}-{slot}"
+
+
+class BookingEngine:
+    """
+    客房库存：每家酒店 rooms_per_hotel 间房，按顺序发放房间序号。
+    hotel_id 应在目录重新生成后保持不变（book_hotel 使用 HotelColumns.key，而不是行号）。
+    库存计数和幂等记录都放在 store 中（storage.MemoryStore 或 RedisStore），
+    使用 Redis 时多个进程/实例共享同一份库存；MemoryStore 每个进程各自一份库存，
+    各进程的确认号互不相同，但库存并不共享。
+    带幂等键的请求结果会被记住，客户端重试时原样返回，不会重复扣库存。
+    """
+
+    def __init__(self, store=None, rooms_per_hotel=20, idempotency_ttl=24 * 3600, wait_timeout=5.0):
+        self.store = store if store is not None else MemoryStore()
+        self.rooms_per_hotel = rooms_per_hotel
+        self.idempotency_ttl = idempotency_ttl
+        self.wait_timeout = wait_timeout    # 同一幂等键的请求正在处理时，最多等待多久
+        # 处理中标记的有效期：处理请求的进程中途退出时，重试最多被挡这么久，而不是整个 idempotency_ttl
+        self.pending_ttl = wait_timeout
+        self._stats_lock = threading.Lock()
+
+        self.reservations = 0
+        self.rooms_booked = 0
+        self.sold_out = 0
+        self.replays = 0
+
+    def available(self, hotel_id):
+        return self.rooms_per_hotel - self.store.counter(f"hotel:rooms:{hotel_id}")
+
+    def _book(self, wanted):
+        """wanted: {hotel_id: rooms}。全部满足才扣库存，否则一间都不订"""
+        first = self.store.reserve(
+            {f"hotel:rooms:{h}": rooms for h, rooms in wanted.items()}, self.rooms_per_hotel
+        )
+        if first is None:
+            with self._stats_lock:
+                self.sold_out += 1
+            raise SoldOut([h for h, rooms in wanted.items() if self.available(h) < rooms])
+        result = []
+        for hotel_id, rooms in wanted.items():
+            epoch, start = first[f"hotel:rooms:{hotel_id}"]
+            result.append({
+                "hotel_id": hotel_id,
+                "rooms": rooms,
+                "confirmation_ids": [confirmation_id(epoch, hotel_id, s) for s in range(start, start + rooms)],
+            })
+        with self._stats_lock:
+            self.reservations += 1
+            self.rooms_booked += sum(wanted.values())
+        return result
+
+    def reserve(self, items, idempotency_key=None):
+        """
+        items: [(hotel_id, rooms), ...]，同一酒店出现多次时合并。
+        返回 [{"hotel_id", "rooms", "confirmation_ids"}, ...]。
+        """
+        wanted = {}
+        for hotel_id, rooms in items:
+            if rooms <= 0:
+                raise BookingError("rooms must be positive")
+            wanted[hotel_id] = wanted.get(hotel_id, 0) + rooms
+        if not wanted:
+            raise BookingError("nothing to reserve")
+        if idempotency_key is None:
+            return self._book(wanted)
+
+        key = f"hotel:idem:{idempotency_key}"
+        fingerprint = [[h, rooms] for h, rooms in sorted(wanted.items())]
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            # 先占住幂等键，同一个键的并发请求只有一个真正扣库存
+            if self.store.set_if_absent(key, json.dumps({"f": fingerprint}), self.pending_ttl):
+                try:
+                    result = self._book(wanted)
+                except BaseException:
+                    self.store.delete(key)
+                    raise
+                self.store.set(key, json.dumps({"f": fingerprint, "result": result}), self.idempotency_ttl)
+                return result
+
+            seen = self.store.get(key)
+            if seen is None:
+                continue    # 前一个请求失败后释放了这个键，重新抢占
+            seen = json.loads(seen)
+            if seen["f"] != fingerprint:
+                raise IdempotencyConflict("idempotency key reused with a different request")
+            if "result" in seen:
+                with self._stats_lock:
+                    self.replays += 1
+                return seen["result"]
+            if time.monotonic() > deadline:
+                raise BookingError("a request with this idempotency key is still in progress")
+            time.sleep(0.005)
+
+    def stats(self):
+        return {
+            "store": self.store.name,
+            "reservations": self.reservations,
+            "rooms_booked": self.rooms_booked,
+            "sold_out": self.sold_out,
+            "idempotent_replays": self.replays,
+        }
+
+
+# 测试用：多线程并发预订，检查不超卖、确认号不重复、幂等重试不重复扣库存
+if __name__ == "__main__":
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    from storage import create_store
+
+    engine = BookingEngine(create_store(), rooms_per_hotel=50)
+    hotels = 40
+    run = time.time_ns()    # 共享存储中可能有上一次运行留下的幂等键
+
+    def worker(seed):
+        rng = random.Random(seed)
+        out = []
+        for n in range(500):
+            key = f"client-{run}-{seed}-{n // 2}"   # 每个请求都重试一次
+            items = [(rng.randrange(hotels), rng.randint(1, 2)) for _ in range(rng.randint(1, 3))]
+            if n % 2:
+                items = last
+            last = items
+            try:
+                out.append((key, engine.reserve(items, key)))
+            except SoldOut:
+                pass
+        return out
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(16) as pool:
+        results = [r for rs in pool.map(worker, range(16)) for r in rs]
+    elapsed = time.perf_counter() - start
+
+    issued = {}
+    for key, result in results:
+        for r in result:
+            for c in r["confirmation_ids"]:
+                issued.setdefault(c, set()).add(key)
+    assert all(len(keys) == 1 for keys in issued.values()), "confirmation id issued twice"
+    assert len(issued) == engine.rooms_booked
+    assert all(engine.available(h) >= 0 for h in range(hotels)), "overbooked"
+    key, result = results[0]
+    assert engine.reserve([(r["hotel_id"], r["rooms"]) for r in result], key) == result
+    try:
+        engine.reserve([(hotels, 1)], key)
+        raise AssertionError("idempotency key reused without conflict")
+    except IdempotencyConflict:
+        pass
+    if engine.store.name == "memory":
+        # 进程内库存在重启（这里用一个新的 store 模拟）后从头发放序号，确认号仍不能重复
+        restarted = BookingEngine(create_store(), rooms_per_hotel=50)
+        again = restarted.reserve([(h, 1) for h in range(hotels)])
+        assert not {c for r in again for c in r["confirmation_ids"]} & issued.keys()
+
+        # 处理请求的进程在写入结果前退出：处理中标记在 pending_ttl 后过期，重试不会被挡一整天
+        short = BookingEngine(create_store(), rooms_per_hotel=50, wait_timeout=0.2)
+        short.store.set_if_absent("hotel:idem:crashed", json.dumps({"f": [[0, 1]]}), short.pending_ttl)
+        assert short.reserve([(0, 1)], "crashed")[0]["rooms"] == 1
+    print(f"✅ {len(results)} requests, {engine.rooms_booked} rooms booked, "
+          f"{engine.replays} replays, {len(results) / elapsed:.0f} req/s")
@@ -0,0 +1,198 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from hotel_store import load_columns
+# 指标模块与 mock_api 共用，和 backend/profile 一样从 mock_api 目录导入
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mock_api"))
+from metrics import timed
+from spatial_index import GridIndex
+
+
+class CatalogSnapshot:
+    """
+    某一时刻目录文件的只读快照（列式数据 + 坐标索引）。
+    mtime_ns/size 只用于发现文件变化；version 是内容摘要，同一份目录在各个实例上相同，
+    游标和共享搜索缓存按它匹配。
+    """
+
+    def __init__(self, columns, mtime_ns, size):
+        self.columns = columns
+        # 二进制目录自带网格索引时直接使用，否则在这里构建
+        self.index = GridIndex(columns.xs, columns.ys, columns.grid)
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.version = columns.digest
+        self._rows_by_key = None
+        self._keys_lock = threading.Lock()
+
+    def find(self, key):
+        """
+        稳定标识（HotelColumns.key）-> 行号，不在该快照中时返回 None。
+        映射在第一次预订时构建（每行算一次哈希），之后由同一快照上的请求共用。
+        """
+        if self._rows_by_key is None:
+            with self._keys_lock:
+                if self._rows_by_key is None:
+                    columns = self.columns
+                    self._rows_by_key = {columns.key(i): i for i in range(len(columns))}
+        return self._rows_by_key.get(key)
+
+
+class HotelCatalog:
+    """
+    进程级酒店目录：文件只解析一次，常驻内存。
+    文件的 mtime/size 变化时在后台线程中重新加载，加载完成后原子地替换整个快照；
+    加载期间搜索继续使用旧快照，既不等待也不会看到半加载的数据。
+    只有第一次加载（还没有任何快照）时调用方需要等待。
+    """
+
+    def __init__(self, filename, loader, check_interval=1.0):
+        self.filename = filename
+        self.loader = loader
+        self.check_interval = check_interval  # 两次 stat 之间的最小间隔（秒）
+        self._snapshot = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()   # 串行化同步加载（首次加载、reload）
+        self._reloading = False         # 是否已有后台加载线程
+        self._reload_lock = threading.Lock()
+
+    def _stat(self):
+        st = os.stat(self.filename)
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self, stat):
+        with timed("catalog_load"):
+            columns = self.loader(self.filename)
+            return CatalogSnapshot(columns, *stat)
+
+    def _swap(self, snap):
+        self._snapshot = snap
+        print(f"📦 Loaded {len(snap.columns)} hotels from {self.filename}")
+
+    def snapshot(self):
+        """返回当前快照；文件有变化时在后台加载新快照，本次仍返回旧的"""
+        snap = self._snapshot
+        if snap is None:
+            return self._first_load()
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self._check(snap)
+        return snap
+
+    def _first_load(self):
+        with self._lock:
+            # 可能已被其他线程加载过
+            if self._snapshot is None:
+                self._swap(self._load(self._stat()))
+                self._last_check = time.monotonic()
+            return self._snapshot
+
+    def _check(self, snap):
+        try:
+            stat = self._stat()
+        except OSError:
+            # 文件暂时不可用（例如正在被替换），继续使用旧快照
+            return
+        if stat == (snap.mtime_ns, snap.size):
+            return
+        with self._reload_lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._background_load, args=(stat,),
+                         name="catalog-reload", daemon=True).start()
+
+    def _background_load(self, stat):
+        try:
+            snap = self._load(stat)
+            with self._lock:
+                self._swap(snap)
+        except Exception as e:
+            # 保留旧快照，下一次检查时重试
+            print(f"⚠️ Failed to reload {self.filename}: {e}")
+        finally:
+            with self._reload_lock:
+                self._reloading = False
+
+    def reload(self):
+        """强制同步重新加载"""
+        with self._lock:
+            self._swap(self._load(self._stat()))
+            self._last_check = time.monotonic()
+            return self._snapshot
+
+
+# ---- 通过共享 store 分发目录文件 ----
+# 没有挂载目录文件的实例启动时从 store 下载到本地，再像普通文件一样 mmap，
+# 同一台机器上的多个进程共用一份页缓存。
+# 文件按 CATALOG_CHUNK 切块存放（单个 Redis 值最大 512 MB，千万行的目录放不进一个值），
+# 块的 key 带内容摘要，按一致性哈希分散到各个副本；清单最后写入，读到清单时所有块都已就绪。
+
+CATALOG_CHUNK = 64 * 2**20
+FETCH_ATTEMPTS = 3
+
+
+def catalog_key(filename):
+    return f"hotel:catalog:{os.path.basename(filename)}"
+
+
+def _chunk_key(filename, digest, i):
+    return f"{catalog_key(filename)}:{digest}:{i}"
+
+
+def _manifest(store, filename):
+    raw = store.get(catalog_key(filename))
+    return None if raw is None else json.loads(raw)
+
+
+def publish_catalog(store, filename, chunk_size=CATALOG_CHUNK):
+    """上传目录文件并切换清单，随后删除上一个版本的块"""
+    digest = load_columns(filename).digest
+    old = _manifest(store, filename)
+    chunks = 0
+    with open(filename, "rb") as f:
+        for data in iter(lambda: f.read(chunk_size), b""):
+            store.set(_chunk_key(filename, digest, chunks), data)
+            chunks += 1
+    size = os.path.getsize(filename)
+    store.set(catalog_key(filename), json.dumps({"digest": digest, "chunks": chunks, "size": size}))
+    if old is not None and old["digest"] != digest:
+        for i in range(old["chunks"]):
+            store.delete(_chunk_key(filename, old["digest"], i))
+
+
+def fetch_catalog(store, filename):
+    """
+    store 中有该目录时写到 filename（原子替换）并返回 True。
+    每次下载写到自己的临时文件，多个 worker 同时下载时互不干扰，最后一个 os.replace 生效。
+    """
+    fd, tmp = tempfile.mkstemp(prefix=f"{os.path.basename(filename)}.", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(FETCH_ATTEMPTS):
+                manifest = _manifest(store, filename)
+                if manifest is None:
+                    return False
+                f.seek(0)
+                f.truncate()
+                for i in range(manifest["chunks"]):
+                    data = store.get(_chunk_key(filename, manifest["digest"], i))
+                    if data is None:
+                        break   # 下载途中目录被重新发布，旧版本的块已删除，按新清单重来
+                    f.write(data)
+                if f.tell() == manifest["size"]:
+                    break
+            else:
+                raise RuntimeError(f"catalog {catalog_key(filename)} kept changing while downloading")
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, filename)
+        return True
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -0,0 +1,24 @@
+"""
+把文本目录 hotels.txt 转换为二进制目录 hotels.bin（格式见 hotel_store.py）。
+
+    python convert.py [hotels.txt] [hotels.bin]
+    python convert.py --publish [hotels.bin]    # 上传到共享 store（STORE_BACKEND=redis）
+"""
+import sys
+
+from catalog import publish_catalog
+from hotel_store import HotelColumns
+from storage import create_store
+
+def convert(src="hotels.txt", dst="hotels.bin"):
+    columns = HotelColumns.from_text(src)
+    columns.save(dst)
+    print(f"✅ Converted {len(columns)} hotels: {src} -> {dst}")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--publish"]:
+        dst = sys.argv[2] if len(sys.argv) > 2 else "hotels.bin"
+        publish_catalog(create_store(), dst)
+        print(f"✅ Published {dst}")
+    else:
+        convert(*sys.argv[1:3])
@@ -1,5 +1,17 @@
-import math
+import base64
 import hashlib
+import json
+from functools import lru_cache
+import os
+import sys
+from catalog import HotelCatalog, fetch_catalog
+from hotel_store import load_columns
+from gazetteer import Gazetteer
+from search_cache import SearchCache, SharedSearchCache
+from storage import default_store
+# 指标模块与 mock_api 共用，和 backend/profile 一样从 mock_api 目录导入
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mock_api"))
+from metrics import timed
 
 def hash_to_coords(location: str):
     """将地名哈希为二维坐标"""
@@ -8,35 +20,233 @@ def hash_to_coords(location: str):
     y = int(h[8:16], 16) % 100
     return x, y
 
-def read_hotels(filename="hotels.txt"):
-    hotels = []
-    with open(filename, "r", encoding="utf-8") as f:
-        for line in f:
-            brand, name, x, y, price, rating = line.strip().split(",")
-            hotels.append({
-                "brand": brand,
-                "name": name,
-                "x": float(x),
-                "y": float(y),
-                "price": int(price),
-                "rating": float(rating)
-            })
-    return hotels
-
-def handler(event, context=None):
+# 地名表只在启动时载入一次
+gazetteer = Gazetteer("locations.txt")
+
+@lru_cache(maxsize=65536)
+def resolve_location(location: str):
+    """地名 -> 坐标：优先查地名表，未收录的地名退回哈希"""
+    coords = gazetteer.lookup(location)
+    if coords is None:
+        coords = hash_to_coords(location)
+    return coords
+
+# 进程级目录，所有请求共享
+# HOTEL_CATALOG 可指向 hotels.txt 或二进制目录 hotels.bin；默认优先使用 hotels.bin
+CATALOG_FILE = os.environ.get(
+    "HOTEL_CATALOG", "hotels.bin" if os.path.exists("hotels.bin") else "hotels.txt"
+)
+store = default_store()
+if store.name != "memory" and not os.path.exists(CATALOG_FILE):
+    fetch_catalog(store, CATALOG_FILE)
+catalog = HotelCatalog(CATALOG_FILE, load_columns)
+
+# 搜索结果缓存，按 (坐标, 过滤条件, 排序, 条数, 游标) 命中，目录重新加载后自动作废
+# SEARCH_CACHE_GRID > 0 时把查询坐标吸附到该步长的网格上，附近的查询共用同一份结果
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "4096"))
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", "60"))
+SEARCH_CACHE_GRID = float(os.environ.get("SEARCH_CACHE_GRID", "0"))
+if store.name == "memory":
+    search_cache = SearchCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+else:
+    search_cache = SharedSearchCache(store, SEARCH_CACHE_TTL)
+
+def snap_coords(x, y, grid=SEARCH_CACHE_GRID):
+    if grid <= 0:
+        return float(x), float(y)
+    return round(x / grid) * grid, round(y / grid) * grid
+
+# 非距离排序时，先取最近的若干个满足条件的酒店作为候选，再按排序方式重排；
+# 一个候选集翻完后接着取更远的下一批候选，结果按距离分批、批内按排序方式排列，翻页不会提前结束
+SORT_MODES = ("distance", "price", "rating", "score")
+RERANK_FACTOR = 5
+RERANK_MIN = 50
+# score 排序的权重（各项先在候选集内归一化到 [0, 1]，分数越小越靠前）
+SCORE_WEIGHTS = {"distance": 0.5, "price": 0.3, "rating": 0.2}
+
+# make_filter 的返回值：过滤条件不可能被满足，不必扫描
+NO_MATCH = object()
+
+def make_filter(columns, max_price=None, min_rating=None, brands=None):
+    """
+    把过滤条件编译为 predicate(index)，直接在列上判断，不组装 dict。
+    没有过滤条件时返回 None；目录为空或条件不可能满足（未知品牌、价格低于最低价等）时返回 NO_MATCH。
+    """
+    if len(columns) == 0:
+        return NO_MATCH
+    conds = []
+    if max_price is not None:
+        if max_price < columns.price_range[0]:
+            return NO_MATCH
+        prices = columns.prices
+        conds.append(lambda i: prices[i] <= max_price)
+    if min_rating is not None:
+        if min_rating > columns.rating_range[1]:
+            return NO_MATCH
+        ratings = columns.ratings
+        conds.append(lambda i: ratings[i] >= min_rating)
+    if brands:
+        wanted = {bid for bid, b in enumerate(columns.brands) if b in set(brands)}
+        if not wanted:
+            return NO_MATCH
+        brand_ids = columns.brand_ids
+        conds.append(lambda i: brand_ids[i] in wanted)
+    if not conds:
+        return None
+    if len(conds) == 1:
+        return conds[0]
+    return lambda i: all(c(i) for c in conds)
+
+def rerank(columns, candidates, sort):
+    """candidates: [(distance, index), ...]，按距离升序"""
+    if sort == "distance" or not candidates:
+        return candidates
+    if sort == "price":
+        return sorted(candidates, key=lambda c: (columns.prices[c[1]], c))
+    if sort == "rating":
+        return sorted(candidates, key=lambda c: (-columns.ratings[c[1]], c))
+
+    def spread(values):
+        lo, hi = min(values), max(values)
+        return lo, (hi - lo) or 1.0
+
+    d_lo, d_span = spread([d for d, _ in candidates])
+    p_lo, p_span = spread([columns.prices[i] for _, i in candidates])
+    r_lo, r_span = spread([columns.ratings[i] for _, i in candidates])
+    w = SCORE_WEIGHTS
+
+    def score(c):
+        d, i = c
+        return (w["distance"] * (d - d_lo) / d_span
+                + w["price"] * (columns.prices[i] - p_lo) / p_span
+                - w["rating"] * (columns.ratings[i] - r_lo) / r_span)
+    return sorted(candidates, key=lambda c: (score(c), c))
+
+class CursorError(ValueError):
+    """翻页游标无效：格式错误、与查询条件不符，或目录已重新加载"""
+
+def query_key(x, y, max_radius, max_price, min_rating, brands, sort):
+    """查询条件的指纹，写进游标，防止拿 A 查询的游标去翻 B 查询"""
+    raw = json.dumps([x, y, max_radius, max_price, min_rating,
+                      sorted(brands) if brands else None, sort], ensure_ascii=False)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+def encode_cursor(state):
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor, key, version):
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise CursorError("invalid cursor")
+    if not isinstance(state, dict) or state.get("q") != key:
+        raise CursorError("cursor does not match this query")
+    if state.get("v") != version:
+        raise CursorError("catalog changed, restart from the first page")
+    return state
+
+def search(snap, x, y, k, max_radius, max_price, min_rating, brands, sort, cursor):
+    """在快照上执行一次搜索，返回 (results, next_cursor)"""
+    columns = snap.columns
+    key = query_key(x, y, max_radius, max_price, min_rating, brands, sort)
+    state = decode_cursor(cursor, key, snap.version) if cursor else None
+
+    # 过滤条件下推到近邻扫描中：只要存在 k 个满足条件的酒店就返回 k 个
+    predicate = make_filter(columns, max_price, min_rating, brands)
+    if predicate is NO_MATCH:
+        return [], None
+    if sort == "distance":
+        # 从上一页最后一个 (距离, 编号) 之后继续扫描
+        after = (state["d"], state["i"]) if state else None
+        with timed("nn_search"):
+            page = snap.index.nearest(x, y, k, max_radius, predicate, after)
+        more = len(page) == k
+        next_state = {"d": page[-1][0], "i": page[-1][1]} if more else None
+    else:
+        # 其他排序在固定大小的候选集内重排，候选集大小由第一页决定。
+        # 游标记录当前候选集的起点（上一批最远的 (距离, 编号)）和集内偏移，
+        # 翻页时只重新取当前这一批，翻完后从它最远的一个之后取下一批
+        pool = state["p"] if state else max(k * RERANK_FACTOR, RERANK_MIN)
+        start = (state["d"], state["i"]) if state and "d" in state else None
+        offset = state["o"] if state else 0
+        page = []
+        while True:
+            with timed("nn_search"):
+                candidates = snap.index.nearest(x, y, pool, max_radius, predicate, start)
+            taken = rerank(columns, candidates, sort)[offset:offset + k - len(page)]
+            page += taken
+            offset += len(taken)
+            exhausted = len(candidates) < pool   # 这一批之后没有更多满足条件的酒店
+            if offset >= len(candidates) and not exhausted:
+                start, offset = candidates[-1], 0
+            if len(page) == k or offset >= len(candidates):
+                break
+        more = offset < len(candidates) or not exhausted
+        next_state = None
+        if more:
+            next_state = {"p": pool, "o": offset}
+            if start is not None:
+                next_state.update(d=start[0], i=start[1])
+
+    next_cursor = None
+    if next_state is not None:
+        next_cursor = encode_cursor(dict(next_state, q=key, v=snap.version))
+    # 只有最终返回的这一页才组装成 dict；id 为酒店的稳定标识（HotelColumns.key），
+    # 目录重新加载、重新生成后仍指向同一家酒店，可直接用于预订
+    results = [dict(columns.row(i), id=columns.key(i), distance=d) for d, i in page]
+    return results, next_cursor
+
+def warm_search_process():
+    """搜索进程池的 initializer：启动时加载目录，首个请求无需读文件"""
+    catalog.snapshot()
+
+def search_latest(*args):
+    """在搜索进程中执行：在该进程当前的快照上搜索，返回 (results, next_cursor, 快照版本)"""
+    snap = catalog.snapshot()
+    return (*search(snap, *args), snap.version)
+
+def handler(event, context=None, pool=None):
     """
     Serverless 入口函数
-    event = {"location": "Shanghai"}
+    event = {"location": "Shanghai", "k": 10, "max_radius": None,
+             "max_price": None, "min_rating": None, "brands": None, "sort": "distance",
+             "cursor": None}
+    返回的 next_cursor 不为 None 时，带上它再次调用即得到下一页。
+    pool 为进程池时，缓存仍在本进程中查找和写入，只有未命中的搜索交给进程池执行。
     """
     location = event.get("location", "Beijing")
-    x, y = hash_to_coords(location)
-    
-    hotels = read_hotels()  # 读文件
-    for h in hotels:
-        h["distance"] = math.sqrt((h["x"] - x)**2 + (h["y"] - y)**2)
+    k = event.get("k", 10)
+    max_radius = event.get("max_radius")
+    max_price = event.get("max_price")
+    min_rating = event.get("min_rating")
+    brands = event.get("brands")
+    sort = event.get("sort", "distance")
+    cursor = event.get("cursor")
+    if sort not in SORT_MODES:
+        raise ValueError(f"unknown sort mode: {sort}")
+    with timed("resolve"):
+        x, y = snap_coords(*resolve_location(location))
     
-    top10 = sorted(hotels, key=lambda h: h["distance"])[:10]
-    return {"query_location": location, "coords": (x, y), "results": top10}
+    snap = catalog.snapshot()  # 内存快照，只读
+    cache_key = (x, y, k, max_radius, max_price, min_rating,
+                 tuple(sorted(set(brands))) if brands else None, sort, cursor)
+    cached = search_cache.get(cache_key, snap.version)
+    if cached is None:
+        args = (x, y, k, max_radius, max_price, min_rating, brands, sort, cursor)
+        if pool is None:
+            cached = search(snap, *args)
+            version = snap.version
+        else:
+            *cached, version = pool.submit(search_latest, *args).result()
+            cached = tuple(cached)
+        # 目录重新加载期间搜索进程的快照可能与本进程不同，这时结果不写入缓存
+        if version == snap.version:
+            search_cache.put(cache_key, version, cached)
+    results, next_cursor = cached
+    # 缓存中的结果为多个请求共享，调用方只读不改
+    return {"query_location": location, "coords": (x, y), "results": results,
+            "next_cursor": next_cursor}
 
 # 测试用
 if __name__ == "__main__":
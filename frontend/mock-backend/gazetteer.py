@@ -0,0 +1,45 @@
+import unicodedata
+
+# 酒店坐标为 [0, 100] x [0, 100] 的平面，把中国范围的经纬度线性映射到该平面
+LON_RANGE = (73.0, 135.0)
+LAT_RANGE = (18.0, 54.0)
+
+
+def normalize(name: str) -> str:
+    """统一全半角、大小写和空白，"Hong Kong" / "hongkong" / "ＨＫ" 视为同一写法"""
+    name = unicodedata.normalize("NFKC", name)
+    return "".join(name.split()).casefold()
+
+
+def project(lat: float, lon: float):
+    """经纬度 -> 酒店平面坐标"""
+    x = (lon - LON_RANGE[0]) / (LON_RANGE[1] - LON_RANGE[0]) * 100
+    y = (lat - LAT_RANGE[0]) / (LAT_RANGE[1] - LAT_RANGE[0]) * 100
+    return min(max(x, 0.0), 100.0), min(max(y, 0.0), 100.0)
+
+
+class Gazetteer:
+    """
+    地名表：地名及其别名 -> 坐标，启动时一次性载入为 dict。
+    文件每行：地名,纬度,经度,别名1|别名2|...
+    """
+
+    def __init__(self, filename="locations.txt"):
+        self.coords = {}
+        with open(filename, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                name, lat, lon, *rest = line.split(",")
+                point = project(float(lat), float(lon))
+                aliases = rest[0].split("|") if rest and rest[0] else []
+                for alias in [name] + aliases:
+                    self.coords[normalize(alias)] = point
+
+    def lookup(self, location: str):
+        """已知地名返回坐标，未知返回 None"""
+        return self.coords.get(normalize(location))
+
+    def __len__(self):
+        return len(self.coords)
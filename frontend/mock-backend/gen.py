@@ -1,19 +1,36 @@
+import csv
 import random
 
+from hotel_store import HotelColumns
+
 brands = ["品牌1", "品牌2", "品牌3", "品牌4", "品牌5", "品牌6", "品牌7"]
 cities = ["地点01", "地点02", "地点03", "地点04", "地点05", "地点06", "地点07", "地点08", "地点09", "地点10"]
 
-def generate_hotels(n=100, output_file="hotels.txt"):
-    with open(output_file, "w", encoding="utf-8") as f:
-        for i in range(n):
-            brand = random.choice(brands)
-            city = random.choice(cities)
-            name = f"{brand} {city} Hotel #{i+1}"
-            x = random.uniform(0, 100)
-            y = random.uniform(0, 100)
-            price = random.randint(200, 1500)
-            rating = round(random.uniform(3.0, 5.0), 1)
-            f.write(f"{brand},{name},{x:.2f},{y:.2f},{price},{rating}\n")
+def generate_rows(n=100):
+    """逐行产出 (brand, name, x, y, price, rating)"""
+    for i in range(n):
+        brand = random.choice(brands)
+        city = random.choice(cities)
+        name = f"{brand} {city} Hotel #{i+1}"
+        x = round(random.uniform(0, 100), 2)
+        y = round(random.uniform(0, 100), 2)
+        price = random.randint(200, 1500)
+        rating = round(random.uniform(3.0, 5.0), 1)
+        yield brand, name, x, y, price, rating
+
+def write_text(rows, output_file):
+    """hotels.txt 文本格式；含逗号的字段按 CSV 规则加引号"""
+    with open(output_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for brand, name, x, y, price, rating in rows:
+            writer.writerow([brand, name, f"{x:.2f}", f"{y:.2f}", price, rating])
+
+def generate_hotels(n=100, output_file="hotels.bin"):
+    """.bin 直接写二进制目录，其余写文本格式"""
+    if output_file.endswith(".bin"):
+        HotelColumns.from_rows(generate_rows(n)).save(output_file)
+    else:
+        write_text(generate_rows(n), output_file)
     print(f"✅ Generated {n} hotels to {output_file}")
 
 if __name__ == "__main__":
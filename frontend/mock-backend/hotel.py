@@ -1,28 +1,104 @@
-from fastapi import FastAPI, Query
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Literal, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query, Response
 from pydantic import BaseModel
-from find_hotels import handler as find_handler
-from book_hotel import handler as book_handler
+from find_hotels import handler as find_handler, catalog, search_cache, CursorError, warm_search_process
+from book_hotel import handler as book_handler, engine as booking_engine
+# 指标模块与 mock_api 共用，和 backend/profile 一样从 mock_api 目录导入
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mock_api"))
+import metrics
 
 app = FastAPI()
+metrics.install(app, "hotel")
+
+
+# ---- 启动时预加载酒店目录，首个请求无需读文件 ----
+@app.on_event("startup")
+def load_catalog():
+    catalog.snapshot()
+
+
+# ---- 可选：把搜索放到进程池中执行，CPU 密集的排序不受 GIL 限制 ----
+# SEARCH_PROCESSES=0（默认）时在请求线程内直接执行。
+# 搜索缓存始终在本进程中，只有未命中的搜索交给进程池，缓存统计即全部请求的统计。
+# 每个搜索进程各自加载目录：使用 hotels.bin 时列和网格索引都是对同一文件的 mmap，
+# 各进程共用页缓存，不重复构建索引；文本目录则每个进程各解析、构建一次。
+# 子进程由 forkserver 创建，不继承本进程的线程和锁（uvicorn、目录热加载线程）。
+SEARCH_PROCESSES = int(os.environ.get("SEARCH_PROCESSES", "0"))
+search_pool = None
+
+
+@app.on_event("startup")
+def start_search_pool():
+    global search_pool
+    if SEARCH_PROCESSES > 0:
+        search_pool = ProcessPoolExecutor(
+            SEARCH_PROCESSES,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=warm_search_process,
+        )
+
+
+@app.on_event("shutdown")
+def stop_search_pool():
+    if search_pool is not None:
+        search_pool.shutdown(cancel_futures=True)
+
+
+def run_search(event):
+    return find_handler(event, pool=search_pool)
 
 
 # ---- 请求体模型 ----
 class ReserveRequest(BaseModel):
-    hotel_id: int
+    hotel_id: str   # 搜索结果中的 id
+    rooms: int = 1
+
+
+class BatchReserveRequest(BaseModel):
+    items: List[ReserveRequest]
 
 
 # ---- 酒店搜索接口 ----
 @app.get("/hotel-search")
-def search(location: str = Query(..., description="输入地名，例如 Shanghai")):
+def search(
+    response: Response,
+    location: str = Query(..., description="输入地名，例如 Shanghai"),
+    max_price: Optional[int] = Query(None, description="最高价格"),
+    min_rating: Optional[float] = Query(None, description="最低评分"),
+    brand: Optional[List[str]] = Query(None, description="品牌，可重复传多个"),
+    sort: Literal["distance", "price", "rating", "score"] = Query("distance", description="排序方式"),
+    limit: int = Query(10, ge=1, le=100, description="返回条数"),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+):
     """
-    调用 find_hotels.handler 返回最近的10家酒店
+    调用 find_hotels.handler 返回最近的酒店（数据来自内存目录）；
+    过滤条件在近邻搜索过程中生效，满足条件的酒店足够时总是返回 limit 家。
+    还有下一页时，响应头 X-Next-Cursor 给出游标，带上 cursor 参数即可继续翻页。
     """
-    result = find_handler({"location": location})
+    try:
+        result = run_search({
+            "location": location,
+            "k": limit,
+            "max_price": max_price,
+            "min_rating": min_rating,
+            "brands": brand,
+            "sort": sort,
+            "cursor": cursor,
+        })
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result["next_cursor"]:
+        response.headers["X-Next-Cursor"] = result["next_cursor"]
     # 转成简化输出（前端用）
     hotels = []
-    for i, h in enumerate(result["results"], start=1):
+    for h in result["results"]:
         hotels.append({
-            "id": i,  # 本demo使用顺序ID
+            "id": h["id"],  # 酒店的稳定标识，可直接用于预订
             "name": h["name"],
             "brand": h["brand"],
             "price": h["price"],
@@ -32,20 +108,58 @@ def search(location: str = Query(..., description="输入地名，例如 Shangha
     return hotels
 
 
+# ---- 搜索缓存统计 ----
+@app.get("/hotel-search/cache/stats")
+def cache_stats():
+    return search_cache.stats()
+
+
 # ---- 酒店预订接口 ----
+# 结果状态 -> HTTP 状态码；sold_out 仍按原接口约定返回 200 + success=False
+BOOKING_STATUS_CODES = {"error": 400, "conflict": 409}
+
+
+def _book(event):
+    result = book_handler(event)
+    status = result["status"]
+    if status in BOOKING_STATUS_CODES:
+        raise HTTPException(status_code=BOOKING_STATUS_CODES[status], detail=result["message"])
+    return result
+
+
 @app.post("/hotel-reserve")
-def reserve(req: ReserveRequest):
+def reserve(req: ReserveRequest, idempotency_key: Optional[str] = Header(None)):
     """
-    调用 book_hotel.handler 完成预订（总是成功）
+    预订一家酒店的 rooms 间房。带 Idempotency-Key 请求头时，重试返回同一结果
     """
-    # demo逻辑：偶数ID -> 模拟失败，奇数ID -> 成功
-    # if req.hotel_id % 2 == 0:
-        # return {"success": False, "message": "预订失败（模拟）"}
-    
-    # 找到对应酒店（可选）
-    hotel_name = f"Hotel #{req.hotel_id}"
-    result = book_handler({"hotel_name": hotel_name})
-    return {"success": True, "confirmation": result["confirmation_id"]}
+    result = _book({"hotel_id": req.hotel_id, "rooms": req.rooms,
+                    "idempotency_key": idempotency_key})
+    if result["status"] != "success":
+        return {"success": False, "message": result["message"]}
+    booking = result["bookings"][0]
+    return {
+        "success": True,
+        "confirmation": booking["confirmation_ids"][0],
+        "confirmations": booking["confirmation_ids"],
+        "hotel_name": booking["hotel_name"],
+    }
+
+
+@app.post("/hotel-reserve/batch")
+def reserve_batch(req: BatchReserveRequest, idempotency_key: Optional[str] = Header(None)):
+    """
+    一次预订多家酒店，全部有房才成功，否则一间都不订
+    """
+    result = _book({"items": [item.dict() for item in req.items],
+                    "idempotency_key": idempotency_key})
+    if result["status"] != "success":
+        return {"success": False, "message": result["message"]}
+    return {"success": True, "bookings": result["bookings"]}
+
+
+@app.get("/hotel-reserve/stats")
+def reserve_stats():
+    return booking_engine.stats()
 
 
 # ---- 根路径 ----
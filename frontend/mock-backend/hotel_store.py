@@ -0,0 +1,257 @@
+import csv
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from functools import cached_property
+
+from spatial_index import GridIndex
+
+# ---- 二进制目录格式（小端）----
+# 头部：magic, version, flags, 行数, 品牌数, 字符串区字节数
+# 之后各列依次存放，每列起始按 8 字节对齐：
+#   x f64[n] | y f64[n] | rating f64[n] | price i32[n] | brand_id u16[n]
+#   | name_offsets u64[n+1] | brand_offsets u64[b+1] | 字符串区（名称在前，品牌在后，UTF-8）
+# flags 含 FLAG_GRID 时，字符串区之后（8 字节对齐）还有预先构建好的坐标网格索引：
+#   g u64, min_x, max_x, min_y, max_y f64 | order u32[n] | starts u32[g*g+1]
+# 加载时直接映射，不再逐行构建；不认识该标志的旧版本读取时忽略文件尾部
+# flags 含 FLAG_DIGEST 时，再之后（8 字节对齐）是 16 字节的内容摘要（HotelColumns.digest），
+# 各实例据此判断手里的目录是否相同，与文件的 mtime、路径无关
+MAGIC = b"HCAT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQQ")
+FLAG_GRID = 1
+FLAG_DIGEST = 2
+GRID_HEADER = struct.Struct("<Q4d")
+DIGEST_SIZE = 16
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(n, n_brands):
+    """各列在文件中的 (起始偏移, 字节数, 类型码)"""
+    sections = [
+        ("xs", n * 8, "d"),
+        ("ys", n * 8, "d"),
+        ("ratings", n * 8, "d"),
+        ("prices", n * 4, "i"),
+        ("brand_ids", n * 2, "H"),
+        ("name_offsets", (n + 1) * 8, "Q"),
+        ("brand_offsets", (n_brands + 1) * 8, "Q"),
+    ]
+    layout = {}
+    offset = HEADER.size
+    for name, size, code in sections:
+        offset = _align(offset)
+        layout[name] = (offset, size, code)
+        offset += size
+    return layout, offset
+
+
+class HotelColumns:
+    """
+    列式酒店目录：坐标、价格、评分各自是一个连续数组，品牌去重后用编号引用，
+    名称存放在一整块 UTF-8 字符串区中按偏移取出。
+    只有最终返回的少量结果才通过 row() 组装成 dict。
+    """
+
+    def __init__(self, xs, ys, prices, ratings, brand_ids, brands,
+                 name_offsets, name_blob, mm=None, grid=None, digest=None):
+        self.xs = xs
+        self.ys = ys
+        self.prices = prices
+        self.ratings = ratings
+        self.brand_ids = brand_ids
+        self.brands = brands            # 品牌编号 -> 品牌名
+        self.name_offsets = name_offsets
+        self.name_blob = name_blob
+        self._mm = mm                   # mmap 加载时保持映射存活
+        self.grid = grid                # 文件中保存的网格索引（GridIndex.grid() 的格式），没有时为 None
+        self._digest = digest           # 文件中保存的内容摘要，没有时第一次用到再计算
+
+    def __len__(self):
+        return len(self.xs)
+
+    def name(self, i):
+        return bytes(self.name_blob[self.name_offsets[i]:self.name_offsets[i + 1]]).decode("utf-8")
+
+    def brand(self, i):
+        return self.brands[self.brand_ids[i]]
+
+    def row(self, i):
+        return {
+            "brand": self.brand(i),
+            "name": self.name(i),
+            "x": self.xs[i],
+            "y": self.ys[i],
+            "price": self.prices[i],
+            "rating": self.ratings[i],
+        }
+
+    @property
+    def digest(self):
+        """
+        目录内容的摘要（32 位十六进制）：只取决于各列数据，同一份目录无论是文本还是二进制、
+        在哪个实例上、何时写入，摘要都相同。用作快照版本，游标和共享缓存按它匹配。
+        """
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+            for col in (self.xs, self.ys, self.ratings, self.prices, self.brand_ids, self.name_offsets):
+                h.update(memoryview(col).cast("B"))
+            h.update(self.name_blob)
+            h.update("\0".join(self.brands).encode("utf-8"))
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def key(self, i):
+        """
+        酒店的稳定标识：由品牌、名称和坐标哈希得到，目录重新生成、行号变化后仍然不变。
+        预订库存按它计数，而不是按行号。
+        """
+        raw = f"{self.brand(i)}\0{self.name(i)}\0{self.xs[i]!r}\0{self.ys[i]!r}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    @cached_property
+    def price_range(self):
+        """(最低价, 最高价)，空目录为 None；第一次用到时扫描一遍，之后缓存"""
+        return (min(self.prices), max(self.prices)) if len(self) else None
+
+    @cached_property
+    def rating_range(self):
+        return (min(self.ratings), max(self.ratings)) if len(self) else None
+
+    # ---- 构建 ----
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: 可迭代的 (brand, name, x, y, price, rating)"""
+        xs, ys, ratings = array("d"), array("d"), array("d")
+        prices, brand_ids = array("i"), array("H")
+        name_offsets = array("Q", [0])
+        blob = bytearray()
+        brand_index = {}
+        for brand, name, x, y, price, rating in rows:
+            xs.append(float(x))
+            ys.append(float(y))
+            prices.append(int(price))
+            ratings.append(float(rating))
+            bid = brand_index.get(brand)
+            if bid is None:
+                bid = brand_index[brand] = len(brand_index)
+            brand_ids.append(bid)
+            blob += name.encode("utf-8")
+            name_offsets.append(len(blob))
+        brands = sorted(brand_index, key=brand_index.get)
+        return cls(xs, ys, prices, ratings, brand_ids, brands, name_offsets, bytes(blob))
+
+    @classmethod
+    def from_text(cls, filename):
+        """从 hotels.txt 构建（CSV 规则，名称中可以带引号包住的逗号）"""
+        with open(filename, "r", encoding="utf-8", newline="") as f:
+            return cls.from_rows(row for row in csv.reader(f) if row)
+
+    # ---- 二进制读写 ----
+
+    def save(self, filename):
+        """先写临时文件再原子替换，已映射旧文件的进程不受影响"""
+        brand_blob = bytearray()
+        brand_offsets = array("Q", [0])
+        for b in self.brands:
+            brand_blob += b.encode("utf-8")
+            brand_offsets.append(len(brand_blob))
+        name_blob = bytes(self.name_blob)
+        blob = name_blob + bytes(brand_blob)
+
+        n = len(self)
+        grid = self.grid or (GridIndex(self.xs, self.ys).grid() if n else None)
+        layout, end = _layout(n, len(self.brands))
+        columns = {
+            "xs": self.xs, "ys": self.ys, "ratings": self.ratings,
+            "prices": self.prices, "brand_ids": self.brand_ids,
+            "name_offsets": self.name_offsets,
+            # 品牌偏移相对整个字符串区
+            "brand_offsets": array("Q", (o + len(name_blob) for o in brand_offsets)),
+        }
+        tmp = f"{filename}.tmp"
+        with open(tmp, "wb") as f:
+            flags = FLAG_DIGEST | (FLAG_GRID if n else 0)
+            f.write(HEADER.pack(MAGIC, VERSION, flags, n, len(self.brands), len(blob)))
+            for name, (offset, size, code) in layout.items():
+                f.write(b"\0" * (offset - f.tell()))
+                data = memoryview(columns[name]).cast("B")
+                assert len(data) == size, name
+                f.write(data)
+            f.write(b"\0" * (_align(end) - f.tell()))
+            f.write(blob)
+            if n:
+                g, min_x, max_x, min_y, max_y, order, starts = grid
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                f.write(GRID_HEADER.pack(g, min_x, max_x, min_y, max_y))
+                f.write(memoryview(order).cast("B"))
+                f.write(memoryview(starts).cast("B"))
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(bytes.fromhex(self.digest))
+        os.replace(tmp, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """mmap 只读映射，各列直接是文件上的 memoryview，不做解析和拷贝"""
+        with open(filename, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mm) < HEADER.size:
+            raise ValueError(f"{filename} 不是酒店目录文件")
+        magic, version, flags, n, n_brands, blob_size = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} 不是酒店目录文件")
+        if version != VERSION:
+            raise ValueError(f"不支持的目录版本: {version}")
+
+        layout, end = _layout(n, n_brands)
+        if len(mm) < _align(end) + blob_size:
+            raise ValueError(f"{filename} 文件不完整")
+        view = memoryview(mm)
+        cols = {
+            name: view[offset:offset + size].cast(code)
+            for name, (offset, size, code) in layout.items()
+        }
+        blob_start = _align(end)
+        blob = view[blob_start:blob_start + blob_size]
+        bo = cols["brand_offsets"]
+        brands = [bytes(blob[bo[i]:bo[i + 1]]).decode("utf-8") for i in range(n_brands)]
+        grid = digest = None
+        offset = _align(blob_start + blob_size)
+        if flags & FLAG_GRID:
+            grid, offset = _load_grid(view, offset, n, filename)
+            offset = _align(offset)
+        if flags & FLAG_DIGEST:
+            if len(mm) < offset + DIGEST_SIZE:
+                raise ValueError(f"{filename} 文件不完整")
+            digest = mm[offset:offset + DIGEST_SIZE].hex()
+        return cls(cols["xs"], cols["ys"], cols["prices"], cols["ratings"],
+                   cols["brand_ids"], brands, cols["name_offsets"], blob, mm=mm, grid=grid,
+                   digest=digest)
+
+
+def _load_grid(view, offset, n, filename):
+    """返回 (grid, 网格区之后的偏移)"""
+    if len(view) < offset + GRID_HEADER.size:
+        raise ValueError(f"{filename} 文件不完整")
+    g, min_x, max_x, min_y, max_y = GRID_HEADER.unpack_from(view, offset)
+    offset += GRID_HEADER.size
+    cells = g * g
+    if len(view) < offset + 4 * (n + cells + 1):
+        raise ValueError(f"{filename} 文件不完整")
+    order = view[offset:offset + 4 * n].cast("I")
+    offset += 4 * n
+    starts = view[offset:offset + 4 * (cells + 1)].cast("I")
+    return (g, min_x, max_x, min_y, max_y, order, starts), offset + 4 * (cells + 1)
+
+
+def load_columns(filename):
+    """按扩展名选择：.bin 为二进制目录（mmap），其余按 hotels.txt 文本格式解析"""
+    if filename.endswith(".bin"):
+        return HotelColumns.load(filename)
+    return HotelColumns.from_text(filename)
@@ -0,0 +1,130 @@
+"""
+压测：分别以 1、2、4… 个 worker 启动 serve.py，测量 /hotel-search 的吞吐随核数的变化。
+
+    python loadtest.py --workers 1,2,4 --hotels 200000 --clients 16 --duration 10
+
+为了测到搜索本身，压测时关闭搜索缓存（SEARCH_CACHE_SIZE=0），地名随机生成。
+客户端也是多进程的，避免压测端自己先被 GIL 限制住。
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from urllib.parse import urlencode
+
+from gen import generate_rows
+from hotel_store import HotelColumns
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SORTS = ("distance", "price", "rating", "score")
+
+
+def client(args):
+    """单个压测进程：保持长连接，持续发请求直到 deadline，返回各请求延迟（毫秒）和失败数"""
+    port, deadline, seed = args
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors = [], 0
+    while time.time() < deadline:
+        query = urlencode({"location": f"city-{rng.randrange(1_000_000)}", "sort": rng.choice(SORTS)})
+        start = time.perf_counter()
+        try:
+            conn.request("GET", f"/hotel-search?{query}")
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors += 1
+    conn.close()
+    return latencies, errors
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/hotel-search?location=Beijing")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run(workers, catalog, port, clients, duration, search_processes):
+    env = dict(os.environ, SEARCH_CACHE_SIZE="0")
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "serve.py"), "--workers", str(workers),
+         "--port", str(port), "--catalog", catalog, "--search-processes", str(search_processes)],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        with Pool(clients) as pool:
+            # 预热：各 worker 都完成启动、载入目录后再开始计时
+            pool.map(client, [(port, time.time() + 1, -i - 1) for i in range(clients)])
+            deadline = time.time() + duration
+            results = pool.map(client, [(port, deadline, i) for i in range(clients)])
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(l for ls, _ in results for l in ls)
+    errors = sum(e for _, e in results)
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/hotel-search 多 worker 压测")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--hotels", type=int, default=200_000, help="压测用目录的酒店数")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--search-processes", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="把结果写入该 JSON 文件")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        catalog = os.path.join(workdir, "hotels.bin")
+        random.seed(0)
+        HotelColumns.from_rows(generate_rows(args.hotels)).save(catalog)
+
+        rows = []
+        for w in [int(w) for w in args.workers.split(",") if w]:
+            r = run(w, catalog, args.port, args.clients, args.duration, args.search_processes)
+            r["speedup"] = r["rps"] / rows[0]["rps"] if rows and rows[0]["rps"] else 1.0
+            rows.append(r)
+            print(f"workers={w:<3} {r['rps']:8.1f} req/s  p50 {r['p50_ms'] or 0:.1f}ms  "
+                  f"p99 {r['p99_ms'] or 0:.1f}ms  x{r['speedup']:.2f}  errors {r['errors']}")
+
+    print(f"CPU 核数: {os.cpu_count()}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class SearchCache:
+    """
+    搜索结果缓存：LRU + TTL，容量满时淘汰最久未使用的条目。
+    每个条目属于某个目录版本；目录重新加载（版本变化）后整个缓存作废。
+    """
+
+    def __init__(self, maxsize=4096, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl                  # 条目最长保留时间（秒），None 表示不过期
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+
+    def get(self, key, version):
+        """命中返回缓存值，否则返回 None"""
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+            }
+
+
+class SharedSearchCache:
+    """
+    放在共享 store（Redis）中的搜索缓存，接口与 SearchCache 相同，多个进程共用。
+    目录版本是 key 的一部分，目录更新后旧条目不再被访问，由 TTL 过期清理。
+    值按 JSON 保存，tuple 读回来是 list。
+    """
+
+    def __init__(self, store, ttl=60.0, prefix="hotel:search"):
+        self.store = store
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key, version):
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode()).hexdigest()
+        return f"{self.prefix}:{version}:{digest}"
+
+    def get(self, key, version):
+        raw = self.store.get(self._key(key, version))
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def put(self, key, version, value):
+        self.store.set(self._key(key, version), json.dumps(value, ensure_ascii=False), self.ttl)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "store": self.store.name,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
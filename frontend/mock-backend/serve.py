@@ -0,0 +1,69 @@
+"""
+生产环境启动脚本：多个 uvicorn worker 进程共用同一个只读的二进制目录。
+
+    python serve.py --port 8000                        # 单 worker（STORE_BACKEND=memory 时的默认）
+    STORE_BACKEND=redis python serve.py --workers 4    # 多 worker 必须共享库存
+    python serve.py --search-processes 2               # worker 再带一个搜索进程池
+
+启动前先确保 hotels.bin 存在且不比 hotels.txt 旧；各 worker 都 mmap 这个文件，
+目录数据在页缓存中只有一份，而不是每个进程各解析一份。
+"""
+import argparse
+import os
+import socket
+import tempfile
+
+import uvicorn
+
+
+def prepare_catalog(src="hotels.txt", dst="hotels.bin"):
+    # 在这里才导入：convert 会间接导入 metrics，而 metrics 在导入时读取 PROMETHEUS_MULTIPROC_DIR，
+    # 必须等 main() 设置好环境变量之后
+    from convert import convert
+
+    if os.path.exists(src) and (
+        not os.path.exists(dst) or os.path.getmtime(dst) < os.path.getmtime(src)
+    ):
+        convert(src, dst)
+    return dst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程启动酒店搜索 API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    shared_store = os.environ.get("STORE_BACKEND", "memory") != "memory"
+    parser.add_argument("--workers", type=int, default=(os.cpu_count() or 1) if shared_store else 1,
+                        help="worker 进程数：共享 store 时默认为 CPU 核数；STORE_BACKEND=memory 时只能为 1")
+    parser.add_argument("--search-processes", type=int, default=0,
+                        help="每个 worker 用于执行搜索的进程数，0 表示在 worker 内执行")
+    parser.add_argument("--catalog", default=None, help="目录文件，默认由 hotels.txt 生成 hotels.bin")
+    args = parser.parse_args()
+    if args.workers > 1 and not shared_store:
+        # 进程内 store 时每个 worker 各有一份库存，每家酒店会被卖出 workers 倍的房间
+        parser.error("--workers > 1 requires a shared store (STORE_BACKEND=redis); "
+                     "with STORE_BACKEND=memory every worker sells its own copy of the inventory")
+
+    # worker 进程在导入 hotel 模块时读取这些环境变量；本进程中导入任何业务模块之前设置好
+    os.environ["SEARCH_PROCESSES"] = str(args.search_processes)
+    if (args.workers > 1 or args.search_processes > 0) and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # 多进程时 /metrics 需要从共享目录汇总各进程的指标
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="hotel-metrics-")
+    catalog = args.catalog or os.environ.get("HOTEL_CATALOG") or prepare_catalog()
+    os.environ["HOTEL_CATALOG"] = catalog
+
+    print(f"🚀 {args.workers} workers on {args.host}:{args.port}, catalog {catalog}")
+    if args.workers <= 1:
+        uvicorn.run("hotel:app", host=args.host, port=args.port, access_log=False)
+        return
+    # 多 worker 时监听 socket 由主进程创建后传给子进程，子进程中 asyncio 认不出它是 TCP socket，
+    # 不会给连接设置 TCP_NODELAY，小响应会被 Nagle 算法和延迟 ACK 拖慢约 40ms。
+    # 这里自己创建监听 socket 并设置 TCP_NODELAY（accept 出来的连接会继承），再交给 uvicorn
+    sock = socket.create_server((args.host, args.port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.set_inheritable(True)
+    uvicorn.run("hotel:app", fd=sock.fileno(), workers=args.workers, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import heapq
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # 没有 numpy 时退回纯 Python 构建（查询不依赖 numpy）
+    np = None
+
+
+class GridIndex:
+    """
+    均匀网格空间索引，用于二维 k 近邻查询。
+    每个格子平均放 POINTS_PER_CELL 个点；查询时从查询点所在格子按“环”向外扩展，
+    当未访问格子的最近可能距离已经超过当前第 k 近的距离时停止。
+    """
+
+    POINTS_PER_CELL = 2
+
+    def __init__(self, xs, ys, grid=None):
+        """grid 为之前 grid() 的返回值（例如随目录文件保存的索引），给出时直接使用、不再构建"""
+        self.xs = xs
+        self.ys = ys
+        n = len(xs)
+        self.size = n
+        if n == 0:
+            self.g = 0
+            return
+
+        if grid is not None:
+            self.g, self.min_x, self.max_x, self.min_y, self.max_y, self.order, self.starts = grid
+        else:
+            if np is not None:
+                ax, ay = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+                self.min_x, self.max_x = float(ax.min()), float(ax.max())
+                self.min_y, self.max_y = float(ay.min()), float(ay.max())
+            else:
+                self.min_x, self.max_x = min(xs), max(xs)
+                self.min_y, self.max_y = min(ys), max(ys)
+            self.g = max(1, int(math.sqrt(n / self.POINTS_PER_CELL)))
+        self.w = (self.max_x - self.min_x) / self.g or 1.0
+        self.h = (self.max_y - self.min_y) / self.g or 1.0
+        if grid is None:
+            if np is not None:
+                self.order, self.starts = self._build_numpy(ax, ay)
+            else:
+                self.order, self.starts = self._build_python()
+
+    # 按格子做计数排序：order 中同一格子的点连续存放，
+    # 格子 c 的点为 order[starts[c]:starts[c + 1]]（不为每个格子单独建 list）
+
+    def _build_python(self):
+        xs, ys, n = self.xs, self.ys, self.size
+        cells = self.g * self.g
+        cell_of = array("I", bytes(4 * n))
+        counts = array("I", bytes(4 * (cells + 1)))
+        for i in range(n):
+            cx, cy = self._cell(xs[i], ys[i])
+            c = cy * self.g + cx
+            cell_of[i] = c
+            counts[c + 1] += 1
+        for c in range(cells):
+            counts[c + 1] += counts[c]
+        fill = array("I", counts)
+        order = array("I", bytes(4 * n))
+        for i in range(n):
+            c = cell_of[i]
+            order[fill[c]] = i
+            fill[c] += 1
+        return order, counts
+
+    def _build_numpy(self, ax, ay):
+        """与 _build_python 结果相同：格子编号的算法一致，稳定排序保证格内按下标升序"""
+        g = self.g
+        cx = np.clip(((ax - self.min_x) / self.w).astype(np.int64), 0, g - 1)
+        cy = np.clip(((ay - self.min_y) / self.h).astype(np.int64), 0, g - 1)
+        cell = cy * g + cx
+        starts = np.zeros(g * g + 1, dtype=np.uint32)
+        np.cumsum(np.bincount(cell, minlength=g * g), out=starts[1:])
+        order = np.argsort(cell, kind="stable").astype(np.uint32)
+        # 查询时逐个取下标，array 比 numpy 标量快得多
+        return array("I", order.tobytes()), array("I", starts.tobytes())
+
+    def grid(self):
+        """(g, min_x, max_x, min_y, max_y, order, starts)，可保存后传给构造函数"""
+        return self.g, self.min_x, self.max_x, self.min_y, self.max_y, self.order, self.starts
+
+    def _cell(self, x, y):
+        g = self.g
+        cx = int((x - self.min_x) / self.w)
+        cy = int((y - self.min_y) / self.h)
+        return min(max(cx, 0), g - 1), min(max(cy, 0), g - 1)
+
+    def _ring(self, cx, cy, r):
+        """与 (cx, cy) 切比雪夫距离恰为 r 的格子（已裁剪到网格内）"""
+        g = self.g
+        if r == 0:
+            yield cx, cy
+            return
+        x0, x1 = cx - r, cx + r
+        y0, y1 = cy - r, cy + r
+        for x in range(max(x0, 0), min(x1, g - 1) + 1):
+            if y0 >= 0:
+                yield x, y0
+            if y1 < g:
+                yield x, y1
+        for y in range(max(y0 + 1, 0), min(y1 - 1, g - 1) + 1):
+            if x0 >= 0:
+                yield x0, y
+            if x1 < g:
+                yield x1, y
+
+    def _outside_bound(self, x, y, cx, cy, r):
+        """已访问区域（半径 r 的格子块）之外任意点到查询点的距离下界"""
+        g = self.g
+        bound = math.inf
+        if cx - r > 0:
+            bound = min(bound, x - (self.min_x + (cx - r) * self.w))
+        if cx + r < g - 1:
+            bound = min(bound, self.min_x + (cx + r + 1) * self.w - x)
+        if cy - r > 0:
+            bound = min(bound, y - (self.min_y + (cy - r) * self.h))
+        if cy + r < g - 1:
+            bound = min(bound, self.min_y + (cy + r + 1) * self.h - y)
+        # 格子边界与点的格子归属都有浮点舍入，留一点余量
+        return bound - 1e-9
+
+    def _cell_max_dist(self, x, y, gx, gy):
+        """格子 (gx, gy) 内任意点到查询点距离的上界"""
+        x0 = self.min_x + gx * self.w
+        y0 = self.min_y + gy * self.h
+        dx = max(abs(x - x0), abs(x - x0 - self.w))
+        dy = max(abs(y - y0), abs(y - y0 - self.h))
+        return math.sqrt(dx * dx + dy * dy) + 1e-9
+
+    def nearest(self, x, y, k=10, max_radius=None, predicate=None, after=None):
+        """
+        返回距 (x, y) 最近的 k 个点 [(distance, index), ...]，按 (距离, 下标) 升序，
+        与对全部点按距离稳定排序后取前 k 个的结果一致。
+        max_radius 不为 None 时只返回距离不超过该值的点。
+        predicate(index) 为过滤条件，在扫描过程中直接跳过不满足的点，
+        因此只要存在 k 个满足条件的点就一定返回 k 个。
+        after=(distance, index) 时只返回排在它之后的点，用于翻页：
+        整个格子都比 after 更近时直接跳过，不再逐点计算距离。
+        """
+        if self.size == 0 or k <= 0:
+            return []
+        xs, ys, order, starts, g = self.xs, self.ys, self.order, self.starts, self.g
+        cx, cy = self._cell(x, y)
+
+        heap = []  # 大根堆：(-distance, -index)
+        r = 0
+        while True:
+            for gx, gy in self._ring(cx, cy, r):
+                c = gy * g + gx
+                if after is not None and self._cell_max_dist(x, y, gx, gy) < after[0]:
+                    continue
+                for i in order[starts[c]:starts[c + 1]]:
+                    if predicate is not None and not predicate(i):
+                        continue
+                    d = math.sqrt((xs[i] - x)**2 + (ys[i] - y)**2)
+                    if max_radius is not None and d > max_radius:
+                        continue
+                    if after is not None and (d, i) <= after:
+                        continue
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d, -i))
+                    elif (d, i) < (-heap[0][0], -heap[0][1]):
+                        heapq.heapreplace(heap, (-d, -i))
+
+            bound = self._outside_bound(x, y, cx, cy, r)
+            if bound == math.inf:
+                break
+            if max_radius is not None and bound > max_radius:
+                break
+            # 距离相等时下标更小者优先，因此只有严格大于才能停止
+            if len(heap) == k and bound > -heap[0][0]:
+                break
+            r += 1
+
+        return sorted((-nd, -ni) for nd, ni in heap)
+
+
+def brute_force_nearest(xs, ys, x, y, k=10, max_radius=None, predicate=None, after=None):
+    """全量扫描 + 排序，作为索引结果的参照"""
+    ranked = sorted(
+        (math.sqrt((xs[i] - x)**2 + (ys[i] - y)**2), i)
+        for i in range(len(xs))
+        if predicate is None or predicate(i)
+    )
+    if max_radius is not None:
+        ranked = [(d, i) for d, i in ranked if d <= max_radius]
+    if after is not None:
+        ranked = [(d, i) for d, i in ranked if (d, i) > after]
+    return ranked[:k]
+
+
+# 测试用：与暴力扫描的结果逐一比对
+if __name__ == "__main__":
+    import random
+
+    rng = random.Random(42)
+    for n in [0, 1, 7, 200, 5000]:
+        xs = [round(rng.uniform(0, 100), 2) for _ in range(n)]
+        ys = [round(rng.uniform(0, 100), 2) for _ in range(n)]
+        index = GridIndex(xs, ys)
+        if n:
+            # numpy 构建与纯 Python 构建一致
+            assert (index.order, index.starts) == index._build_python(), n
+            rebuilt = GridIndex(xs, ys, index.grid())
+            assert rebuilt.w == index.w and rebuilt.h == index.h
+        for _ in range(200):
+            qx, qy = rng.uniform(-20, 120), rng.uniform(-20, 120)
+            k = rng.choice([1, 5, 10, 50])
+            radius = rng.choice([None, 5.0, 30.0])
+            expected = brute_force_nearest(xs, ys, qx, qy, k, radius)
+            assert index.nearest(qx, qy, k, radius) == expected, (n, qx, qy, k, radius)
+
+    # 带过滤条件
+    xs = [rng.uniform(0, 100) for _ in range(3000)]
+    ys = [rng.uniform(0, 100) for _ in range(3000)]
+    index = GridIndex(xs, ys)
+    for mod in [2, 7, 500, 5000]:
+        pred = lambda i: i % mod == 0
+        for _ in range(50):
+            qx, qy = rng.uniform(0, 100), rng.uniform(0, 100)
+            expected = brute_force_nearest(xs, ys, qx, qy, 10, None, pred)
+            assert index.nearest(qx, qy, 10, None, pred) == expected, mod
+
+    # 逐页翻取，拼起来应与一次取全部相同
+    for _ in range(30):
+        qx, qy = rng.uniform(0, 100), rng.uniform(0, 100)
+        pages, after = [], None
+        while True:
+            page = index.nearest(qx, qy, 25, 40.0, after=after)
+            assert page == brute_force_nearest(xs, ys, qx, qy, 25, 40.0, after=after)
+            pages += page
+            if len(page) < 25:
+                break
+            after = page[-1]
+        assert pages == brute_force_nearest(xs, ys, qx, qy, len(xs), 40.0)
+
+    # 大量重复坐标（距离并列）
+    xs = [float(rng.randint(0, 5)) for _ in range(1000)]
+    ys = [float(rng.randint(0, 5)) for _ in range(1000)]
+    index = GridIndex(xs, ys)
+    for _ in range(100):
+        qx, qy = rng.uniform(0, 5), rng.uniform(0, 5)
+        assert index.nearest(qx, qy, 10) == brute_force_nearest(xs, ys, qx, qy, 10)
+        after = brute_force_nearest(xs, ys, qx, qy, 10)[-1]
+        assert index.nearest(qx, qy, 10, after=after) == brute_force_nearest(xs, ys, qx, qy, 10, after=after)
+
+    print("✅ GridIndex matches brute force")
@@ -0,0 +1,386 @@
+"""
+共享状态存储：搜索缓存、预订库存和幂等记录通过它读写。
+
+    STORE_BACKEND=memory   进程内（默认），每个进程各自一份
+    STORE_BACKEND=redis    backend/Redis/distributed-redis.yaml 部署的多个 Redis，
+                           按一致性哈希把 key 分到各个副本，多个进程/Pod 共享同一份状态
+
+Redis 相关配置：
+    REDIS_NODES     逗号分隔的 host:port，例如 redis-service-0:6379,redis-service-1:6379
+    REDIS_PASSWORD  对应 Secret spilot-redis-config 中的 redis-password
+    REDIS_MAX_CONNECTIONS  每个副本连接池的最大连接数
+"""
+import bisect
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+try:
+    import redis
+except ImportError:  # 只用进程内存储时不需要 redis
+    redis = None
+
+
+class MemoryStore:
+    """进程内实现，语义与 RedisStore 一致；值原样保存"""
+
+    name = "memory"
+    PURGE_EVERY = 1024
+
+    def __init__(self, stripes=64):
+        self._data = {}         # key -> (expires_at 或 None, value)
+        self._lock = threading.Lock()
+        self._counters = {}     # name -> [booked, issued, epoch]
+        self._counter_locks = [threading.Lock() for _ in range(stripes)]
+        self._writes = 0
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def _put(self, key, value, ttl, now):
+        self._data[key] = (None if ttl is None else now + ttl, value)
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            expired = [k for k, (exp, _) in self._data.items() if exp is not None and exp <= now]
+            for k in expired:
+                del self._data[k]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            return None if entry is None else entry[1]
+
+    def mget(self, keys):
+        with self._lock:
+            now = time.monotonic()
+            return [None if e is None else e[1] for e in (self._live(k, now) for k in keys)]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._put(key, value, ttl, time.monotonic())
+
+    def mset(self, mapping, ttl=None):
+        with self._lock:
+            now = time.monotonic()
+            for key, value in mapping.items():
+                self._put(key, value, ttl, now)
+
+    def set_if_absent(self, key, value, ttl=None):
+        with self._lock:
+            now = time.monotonic()
+            if self._live(key, now) is not None:
+                return False
+            self._put(key, value, ttl, now)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def counter(self, name):
+        """reserve() 维护的当前占用量"""
+        return self._counters.get(name, (0, 0))[0]
+
+    def reserve(self, wanted, limit):
+        """
+        wanted: {name: n}。所有计数器的占用量加 n 后都不超过 limit 时才一起增加，
+        返回 {name: (纪元, 本次分到的第一个序号)}；否则不做任何修改，返回 None。
+        序号只增不减，因此即使之后有回滚也不会重复发放。
+        纪元是计数器创建时随机生成的值，和计数器存放在一起：计数器丢失（进程重启、Redis 清空）
+        后重新创建时纪元随之更换，(纪元, 序号) 不会与丢失前发放的重复。
+        """
+        stripes = len(self._counter_locks)
+        locks = [self._counter_locks[s] for s in sorted({hash(n) % stripes for n in wanted})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for name, n in wanted.items():
+                if self.counter(name) + n > limit:
+                    return None
+            first = {}
+            for name, n in wanted.items():
+                c = self._counters.get(name)
+                if c is None:
+                    c = self._counters[name] = [0, 0, _new_epoch()]
+                first[name] = (c[2], c[1] + 1)
+                c[0] += n
+                c[1] += n
+            return first
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+def _new_epoch():
+    return uuid.uuid4().hex[:8]
+
+
+class HashRing:
+    """一致性哈希环：每个节点放 replicas 个虚拟节点，增删节点时只有少量 key 需要迁移"""
+
+    def __init__(self, nodes, replicas=128):
+        self._ring = sorted(
+            (self._hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas)
+        )
+        self._keys = [h for h, _ in self._ring]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def node(self, key):
+        i = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._ring[i][1]
+
+
+# 在单个副本上原子地检查并增加一组计数器，返回每个计数器的纪元和第一个序号
+# 计数器还没有纪元（新建，或所在副本被清空过）时写入 ARGV 中给出的新纪元
+# KEYS: name1:booked, name1:issued, name1:epoch, name2:booked, ...
+# ARGV: n1, n2, ..., 新纪元, limit
+_RESERVE_SCRIPT = """
+local limit = tonumber(ARGV[#ARGV])
+local epoch = ARGV[#ARGV - 1]
+local count = #ARGV - 2
+for i = 1, count do
+    local booked = tonumber(redis.call('GET', KEYS[3 * i - 2]) or '0')
+    if booked + tonumber(ARGV[i]) > limit then
+        return false
+    end
+end
+local first = {}
+for i = 1, count do
+    local n = tonumber(ARGV[i])
+    redis.call('INCRBY', KEYS[3 * i - 2], n)
+    local slot = redis.call('INCRBY', KEYS[3 * i - 1], n) - n + 1
+    redis.call('SET', KEYS[3 * i], epoch, 'NX')
+    first[2 * i - 1] = redis.call('GET', KEYS[3 * i])
+    first[2 * i] = slot
+end
+return first
+"""
+
+
+class RedisStore:
+    """
+    多个 Redis 副本组成的存储：key 按一致性哈希路由到副本，每个副本一个连接池。
+    批量读写按副本分组，每组用一个 pipeline 发出。
+    """
+
+    name = "redis"
+
+    def __init__(self, nodes, password=None, max_connections=32, replicas=128, clients=None):
+        """clients: 可选的 {node: 客户端}，给出时不再自行建立连接（测试时传入 fakeredis）"""
+        if not nodes:
+            raise ValueError("no redis nodes configured")
+        self.nodes = list(nodes)
+        self.ring = HashRing(self.nodes, replicas)
+        self._clients = dict(clients or {})
+        if len(self._clients) < len(self.nodes) and redis is None:
+            raise RuntimeError("STORE_BACKEND=redis requires the redis package")
+        for node in self.nodes:
+            if node in self._clients:
+                continue
+            host, _, port = node.partition(":")
+            pool = redis.ConnectionPool(
+                host=host, port=int(port or 6379), password=password,
+                max_connections=max_connections,
+            )
+            self._clients[node] = redis.Redis(connection_pool=pool)
+        self._reserve = {node: c.register_script(_RESERVE_SCRIPT) for node, c in self._clients.items()}
+
+    def _client(self, key):
+        return self._clients[self.ring.node(key)]
+
+    def _group(self, keys):
+        groups = {}
+        for key in keys:
+            groups.setdefault(self.ring.node(key), []).append(key)
+        return groups
+
+    def get(self, key):
+        return self._client(key).get(key)
+
+    def mget(self, keys):
+        found = {}
+        for node, group in self._group(keys).items():
+            pipe = self._clients[node].pipeline(transaction=False)
+            for key in group:
+                pipe.get(key)
+            found.update(zip(group, pipe.execute()))
+        return [found[k] for k in keys]
+
+    def set(self, key, value, ttl=None):
+        self._client(key).set(key, value, ex=self._ttl(ttl))
+
+    def mset(self, mapping, ttl=None):
+        for node, group in self._group(mapping).items():
+            pipe = self._clients[node].pipeline(transaction=False)
+            for key in group:
+                pipe.set(key, mapping[key], ex=self._ttl(ttl))
+            pipe.execute()
+
+    def set_if_absent(self, key, value, ttl=None):
+        return bool(self._client(key).set(key, value, nx=True, ex=self._ttl(ttl)))
+
+    def delete(self, key):
+        self._client(key).delete(key)
+
+    @staticmethod
+    def _ttl(ttl):
+        return None if ttl is None else max(1, int(round(ttl)))
+
+    def counter(self, name):
+        value = self._client(name).get(f"{name}:booked")
+        return int(value) if value is not None else 0
+
+    def reserve(self, wanted, limit):
+        """
+        语义同 MemoryStore.reserve。同一副本上的计数器由 Lua 脚本原子地一起检查和增加；
+        跨副本时逐个副本执行，某个副本失败则把已成功副本的占用量退回（序号不退）。
+        """
+        done = []
+        first = {}
+        for node, names in self._group(wanted).items():
+            keys = [k for n in names for k in (f"{n}:booked", f"{n}:issued", f"{n}:epoch")]
+            args = [wanted[n] for n in names] + [_new_epoch(), limit]
+            result = self._reserve[node](keys=keys, args=args)
+            if result is None:
+                for done_node, done_names in done:
+                    pipe = self._clients[done_node].pipeline(transaction=False)
+                    for n in done_names:
+                        pipe.decrby(f"{n}:booked", wanted[n])
+                    pipe.execute()
+                return None
+            done.append((node, names))
+            epochs, slots = result[0::2], result[1::2]
+            first.update(
+                (n, (e.decode() if isinstance(e, bytes) else e, int(slot)))
+                for n, e, slot in zip(names, epochs, slots)
+            )
+        return first
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """进程级共享的 store，按环境变量创建一次"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = create_store()
+        return _default_store
+
+
+def create_store():
+    backend = os.environ.get("STORE_BACKEND", "memory")
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "redis":
+        nodes = [n.strip() for n in os.environ.get("REDIS_NODES", "").split(",") if n.strip()]
+        return RedisStore(
+            nodes,
+            password=os.environ.get("REDIS_PASSWORD") or None,
+            max_connections=int(os.environ.get("REDIS_MAX_CONNECTIONS", "32")),
+        )
+    raise ValueError(f"unknown STORE_BACKEND: {backend}")
+
+
+# 测试用：python storage.py 检查进程内实现，装有 fakeredis 时再对三个模拟的 Redis 副本运行同样的检查；
+# 设置 STORE_BACKEND=redis REDIS_NODES=localhost:6379 时对真实的 Redis 运行
+if __name__ == "__main__":
+    import uuid
+    from concurrent.futures import ThreadPoolExecutor
+
+    # 一致性哈希：增加一个节点后只有约 1/4 的 key 换了位置
+    keys = [f"key-{i}" for i in range(10000)]
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+    moved = sum(before.node(k) != after.node(k) for k in keys)
+    assert 0.15 < moved / len(keys) < 0.35, moved
+    assert all(after.node(k) == "d" for k in keys if before.node(k) != after.node(k))
+
+    def check(store):
+        prefix = f"selfcheck:{uuid.uuid4().hex}"
+        store.mset({f"{prefix}:{i}": str(i) for i in range(50)}, ttl=60)
+        values = store.mget([f"{prefix}:{i}" for i in range(50)] + [f"{prefix}:missing"])
+        assert [v if v is None or isinstance(v, str) else v.decode() for v in values] == \
+            [str(i) for i in range(50)] + [None]
+        assert store.set_if_absent(f"{prefix}:once", "1", ttl=60)
+        assert not store.set_if_absent(f"{prefix}:once", "2", ttl=60)
+
+        names = [f"{prefix}:rooms:{h}" for h in range(8)]
+
+        def book(seed):
+            got = []
+            for n in range(200):
+                wanted = {names[(seed + n) % 8]: 1, names[(seed + n * 3) % 8]: 2}
+                first = store.reserve(wanted, 100)
+                if first is not None:
+                    got += [(name, e, s) for name, (e, f) in first.items() for s in range(f, f + wanted[name])]
+            return got
+
+        with ThreadPoolExecutor(8) as pool:
+            slots = [s for got in pool.map(book, range(8)) for s in got]
+        assert len(slots) == len(set(slots)), "slot issued twice"
+        assert all(store.counter(n) <= 100 for n in names), "over limit"
+        print(f"✅ {store.name} store: {len(slots)} slots issued, counters {[store.counter(n) for n in names]}")
+
+    def check_rollback(store):
+        """跨副本预订：后一个副本容量不足时，前一个副本上已成功的占用量要退回，序号不退"""
+        prefix = f"selfcheck:{uuid.uuid4().hex}"
+        names = [f"{prefix}:rooms:{h}" for h in range(64)]
+        nodes = {}
+        for name in names:
+            nodes.setdefault(store.ring.node(name), []).append(name)
+        (a, a2), (b, _) = [group[:2] for group in list(nodes.values())[:2]]
+
+        def slots(first):
+            return None if first is None else {name: slot for name, (_, slot) in first.items()}
+
+        # 同一副本上的两个计数器由 Lua 脚本一起检查：一个不够，两个都不动
+        assert slots(store.reserve({a2: 3}, 3)) == {a2: 1}
+        assert store.reserve({a: 1, a2: 1}, 3) is None
+        assert store.counter(a) == 0 and store.counter(a2) == 3
+
+        assert slots(store.reserve({b: 3}, 3)) == {b: 1}
+        assert store.reserve({a: 2, b: 1}, 3) is None     # a 所在副本先成功，b 所在副本失败
+        assert store.counter(a) == 0, "booked count not rolled back"
+        assert store.counter(b) == 3
+        assert slots(store.reserve({a: 1}, 3)) == {a: 3}  # 回滚的序号 1、2 不再发放
+        print(f"✅ {store.name} store: cross-replica rollback over {len(nodes)} replicas")
+
+    store = create_store()
+    check(store)
+    if store.name == "redis" and len(store.nodes) > 1:
+        check_rollback(store)
+    if store.name == "memory":
+        try:
+            import fakeredis
+        except ImportError:
+            fakeredis = None
+        if fakeredis is not None:
+            nodes = [f"fake-{i}:6379" for i in range(3)]
+            fake = RedisStore(nodes, clients={
+                node: fakeredis.FakeRedis(server=fakeredis.FakeServer()) for node in nodes
+            })
+            check(fake)
+            check_rollback(fake)
+
+            # 副本被清空后序号从 1 重新发放，纪元必须换掉，(纪元, 序号) 不能重复
+            name = f"selfcheck:{uuid.uuid4().hex}:rooms"
+            before = fake.reserve({name: 1}, 10)
+            for client in fake._clients.values():
+                client.flushall()
+            after = fake.reserve({name: 1}, 10)
+            assert after[name][1] == before[name][1] == 1 and after[name] != before[name], "epoch reused"
+            print("✅ redis store: new epoch after the counters are flushed")
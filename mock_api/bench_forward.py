@@ -0,0 +1,77 @@
+"""
+ft/invoke 转发延迟基准：每次新建 ClientSession（旧实现） vs 复用连接池（call_ft_invoke）。
+在本地启动一个替身上游，不依赖真实后端。
+
+    python bench_forward.py --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+
+import restore
+
+
+async def start_upstream(port: int) -> web.AppRunner:
+    """本地替身上游：原样返回请求体"""
+    async def ft_invoke(request: web.Request):
+        return web.json_response({"echo": await request.json()})
+
+    upstream = web.Application()
+    upstream.router.add_post("/ft/invoke", ft_invoke)
+    runner = web.AppRunner(upstream, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def forward_fresh_session(request_data: dict) -> dict:
+    """旧实现：每个请求新建会话和连接"""
+    timeout = aiohttp.ClientTimeout(total=restore.FT_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.post(restore.FT_INVOKE_URL, json=request_data) as response:
+            return await response.json()
+
+
+async def measure(name: str, forward, n: int) -> dict:
+    payload = {"app_id": 1, "path": "/", "name": "bench"}
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await forward(payload)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    result = {
+        "name": name,
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+    }
+    print(f"{name:<16} mean {result['mean_ms']:.3f} ms  "
+          f"p50 {result['p50_ms']:.3f} ms  p95 {result['p95_ms']:.3f} ms")
+    return result
+
+
+async def main(n: int, port: int):
+    restore.FT_INVOKE_URL = f"http://127.0.0.1:{port}/ft/invoke"
+    runner = await start_upstream(port)
+    session = restore.create_ft_session()
+    try:
+        before = await measure("fresh-session", forward_fresh_session, n)
+        after = await measure("pooled-session",
+                              lambda data: restore.call_ft_invoke(data, session), n)
+        print(f"p50 speedup: {before['p50_ms'] / after['p50_ms']:.2f}x")
+    finally:
+        await session.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--port", type=int, default=18328)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.port))
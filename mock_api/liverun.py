@@ -0,0 +1,154 @@
+import threading
+import time
+
+
+class LiveRun:
+    """
+    一次在后台线程中执行的任务（恢复）：执行过程中发布的事件按顺序保存，
+    任意多个订阅者都可以从头读取（后加入的先回放已有事件），结束后保存结果或异常。
+    持有者（attach）全部离开而任务还没结束时，通过 cancel 回调提前终止任务。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.events = []            # [(event, data), ...]
+        self.done = False
+        self.cancelled = False
+        self._result = None
+        self._error = None
+        self._holders = 0
+        self._canceller = None
+        self._callbacks = []
+
+    @property
+    def failed(self):
+        return self.done and self._error is not None
+
+    @property
+    def error(self):
+        return self._error
+
+    # ---- 执行方 ----
+
+    def publish(self, event, data):
+        with self._cond:
+            self.events.append((event, data))
+            self._cond.notify_all()
+
+    def set_canceller(self, fn):
+        """注册取消回调；已经被取消时返回 False，由调用方自行终止"""
+        with self._cond:
+            if self.cancelled:
+                return False
+            self._canceller = fn
+            return True
+
+    def finish(self, result=None, error=None):
+        with self._cond:
+            if self.done:
+                return
+            self._result, self._error = result, error
+            self.done = True
+            self._canceller = None
+            callbacks, self._callbacks = self._callbacks, []
+            self._cond.notify_all()
+        for fn in callbacks:
+            fn(self)
+
+    def add_done_callback(self, fn):
+        with self._cond:
+            if not self.done:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    # ---- 订阅方 ----
+
+    def events_since(self, index):
+        """返回 (index 之后的事件, 是否已结束)，不阻塞"""
+        with self._cond:
+            return self.events[index:], self.done
+
+    def wait(self, timeout=None):
+        """等待结束，不算作持有者；成功返回 True"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done, timeout)
+            return self.done and self._error is None
+
+    def result(self, timeout=None):
+        """作为持有者等待结束并返回结果，失败时抛出任务的异常"""
+        self.attach()
+        try:
+            with self._cond:
+                if not self._cond.wait_for(lambda: self.done, timeout):
+                    raise TimeoutError("run did not finish in time")
+                if self._error is not None:
+                    raise self._error
+                return self._result
+        finally:
+            self.detach()
+
+    def attach(self):
+        with self._cond:
+            self._holders += 1
+
+    def detach(self):
+        """最后一个持有者离开且任务未结束时取消任务"""
+        with self._cond:
+            self._holders -= 1
+            if self._holders > 0 or self.done or self.cancelled:
+                return
+            self.cancelled = True
+            canceller, self._canceller = self._canceller, None
+        if canceller is not None:
+            canceller()
+
+
+class LiveFlight:
+    """
+    并发请求合并：同一个 key 同时只有一个 LiveRun 在执行，其余调用者加入它
+    （流式订阅者可以看到已经发布的全部事件）。
+    成功结束后再缓存 ttl 秒，紧随其后到达的调用者直接拿到这次的结果。
+    """
+
+    def __init__(self, ttl=0.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._runs = {}    # key -> LiveRun（执行中）
+        self._cache = {}   # key -> (finished_at, LiveRun)
+
+        self.executed = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    def join(self, key, start):
+        """返回 key 对应的 LiveRun；没有执行中或缓存的结果时调用 start() 新建一个"""
+        with self._lock:
+            run = self._runs.get(key)
+            if run is not None:
+                self.coalesced += 1
+                return run
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                self.cache_hits += 1
+                return cached[1]
+            run = self._runs[key] = start()
+            self.executed += 1
+        run.add_done_callback(lambda r: self._finished(key, r))
+        return run
+
+    def _finished(self, key, run):
+        with self._lock:
+            if self._runs.get(key) is run:
+                del self._runs[key]
+            if not run.failed and self.ttl > 0:
+                self._cache[key] = (time.monotonic(), run)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "cache_hits": self.cache_hits,
+                "in_flight": len(self._runs),
+            }
@@ -0,0 +1,285 @@
+"""
+mitosis 日志的流式读取：
+- plot.log:    "Plot Info: x: [...], y: [...]"，解析为 array('d')
+- restore.log: 直接拼接、无分隔符的 JSON 对象流，每恢复一个实例追加一个
+
+两者都按块读取，内存占用与文件大小无关；都返回读到的字节位置，可从该位置继续读取。
+"""
+import codecs
+import json
+import re
+from array import array
+
+CHUNK_SIZE = 64 * 1024
+# 单个对象的上限：超过仍未解析完的文本按损坏处理，保证内存占用有界
+MAX_OBJECT_SIZE = 1024 * 1024
+
+# 对象之间的边界：上一个对象的 "}" 与下一个对象的 "{" 之间只有空白
+_BOUNDARY = re.compile(r"\}\s*(?=\{)")
+# 块边界截断在数字或 true/false/null 中间时，出错位置之后只剩这样的片段
+_PARTIAL_TOKEN = re.compile(r"[-+.0-9a-zA-Z]{0,5}")
+
+
+class JsonStreamDecoder:
+    """
+    把字节块喂进来，吐出其中完整的 JSON 对象及其结束位置（字节偏移）。
+    尾部不完整的对象（以及被截断的 UTF-8 字符）留到下一块再解析。
+    出错位置不在缓冲区末尾（或未写完的对象超过 MAX_OBJECT_SIZE）时按损坏处理：
+    跳到下一个对象的开头继续解析，跳过的段数记在 errors 中。
+    """
+
+    def __init__(self, offset=0, max_object_size=MAX_OBJECT_SIZE):
+        self.offset = offset        # 已解析（或已跳过）文本的结束位置
+        self.max_object_size = max_object_size
+        self.errors = 0             # 跳过的损坏段数
+        self._text = ""             # 已解码但尚未解析成对象的文本
+        self._skipping = False      # 正在跳过损坏的对象，寻找下一个对象的开头
+        self._utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._decoder = json.JSONDecoder()
+
+    @staticmethod
+    def _truncated(text, error):
+        """解析错误是否只是因为对象还没写完"""
+        return (error.msg.startswith("Unterminated string")
+                or _PARTIAL_TOKEN.fullmatch(text, error.pos) is not None)
+
+    def _advance(self, text, start, end):
+        self.offset += len(text[start:end].encode("utf-8"))
+
+    def feed(self, data):
+        """返回 [(obj, end_offset), ...]"""
+        text = self._text + self._utf8.decode(data)
+        results = []
+        pos = 0
+        while True:
+            if self._skipping:
+                m = _BOUNDARY.search(text, pos)
+                if m is None:
+                    # 下一个对象还没出现：丢弃损坏部分，只留下可能是边界开头的 "}"
+                    cut = text.rfind("}", pos)
+                    if cut < 0 or text[cut + 1:].strip():
+                        cut = len(text)
+                    self._advance(text, pos, cut)
+                    pos = cut
+                    break
+                self._advance(text, pos, m.end())
+                pos = m.end()
+                self._skipping = False
+
+            start = pos
+            while pos < len(text) and text[pos].isspace():
+                pos += 1
+            if pos >= len(text):
+                break
+            try:
+                obj, pos = self._decoder.raw_decode(text, pos)
+            except json.JSONDecodeError as e:
+                if self._truncated(text, e) and len(text) - start <= self.max_object_size:
+                    pos = start
+                    break  # 对象还没写完
+                self.errors += 1
+                self._skipping = True
+                self._advance(text, start, e.pos)
+                pos = e.pos
+                continue
+            self._advance(text, start, pos)
+            results.append((obj, self.offset))
+        self._text = text[pos:]
+        return results
+
+
+def iter_json_objects(path, offset=0, chunk_size=CHUNK_SIZE):
+    """从 offset 开始逐个产出 restore.log 中的对象：(obj, end_offset)"""
+    decoder = JsonStreamDecoder(offset)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            yield from decoder.feed(data)
+
+
+class JsonStreamTail:
+    """
+    增量读取正在写入的 restore.log：每次 poll() 只读取上次位置之后新增的字节，
+    返回其中新出现的完整对象。
+    """
+
+    def __init__(self, path, offset=0, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.read_offset = offset   # 已读取到的字节位置
+        self.chunk_size = chunk_size
+        self._decoder = JsonStreamDecoder(offset)
+
+    @property
+    def offset(self):
+        """已解析对象的结束位置，可用于之后恢复读取"""
+        return self._decoder.offset
+
+    def poll(self):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return []
+        objects = []
+        with f:
+            f.seek(self.read_offset)
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                self.read_offset += len(data)
+                objects.extend(obj for obj, _ in self._decoder.feed(data))
+        return objects
+
+
+class RestorePoints:
+    """restore.log 中各实例返回的点，按列存放"""
+
+    def __init__(self):
+        self.xs = array("d")
+        self.ys = array("d")
+        self.values = array("d")
+        self.instances = 0      # 实例（JSON 对象）个数
+        self.offset = 0         # 读到的字节位置
+
+    def add(self, obj):
+        self.instances += 1
+        for p in obj.get("points", []):
+            x, y = p["coords"]
+            self.xs.append(x)
+            self.ys.append(y)
+            self.values.append(p.get("value", 0.0))
+
+
+def read_restore_log(path, offset=0, chunk_size=CHUNK_SIZE, into=None):
+    """
+    流式解析 restore.log。传入上次返回的结果作为 into、其 offset 作为 offset，
+    即可只解析新增部分。
+    """
+    points = into if into is not None else RestorePoints()
+    points.offset = offset
+    for obj, end in iter_json_objects(path, offset, chunk_size):
+        points.add(obj)
+        points.offset = end
+    return points
+
+
+class _PlotParser:
+    """
+    按块解析 "Plot Info: x: [...], y: [...]" 的状态机。
+    直接处理字节（标记和数字都是 ASCII），结束后 _buf 中是 y 数组 "]" 之后已读入的字节，
+    由此可以算出记录在文件中的结束位置。
+    """
+
+    MARKERS = (b"Plot Info:", b"x: [", None, b"y: [", None)
+
+    def __init__(self):
+        self.x = array("d")
+        self.y = array("d")
+        self.state = 0          # MARKERS 的下标；None 表示正在读数组
+        self._buf = b""
+
+    @property
+    def done(self):
+        return self.state >= len(self.MARKERS)
+
+    def feed(self, data):
+        self._buf += data
+        while not self.done:
+            marker = self.MARKERS[self.state]
+            if marker is not None:
+                idx = self._buf.find(marker)
+                if idx < 0:
+                    # 只保留可能构成标记前缀的尾部
+                    self._buf = self._buf[-(len(marker) - 1):]
+                    return
+                self._buf = self._buf[idx + len(marker):]
+                self.state += 1
+                continue
+
+            out = self.x if self.state == 2 else self.y
+            end = self._buf.find(b"]")
+            body = self._buf if end < 0 else self._buf[:end]
+            tokens = body.split(b",")
+            if end < 0:
+                # 最后一个数字可能被块边界截断
+                self._buf = tokens.pop()
+            else:
+                self._buf = self._buf[end + 1:]
+            for tok in tokens:
+                tok = tok.strip()
+                if tok:
+                    out.append(float(tok))
+            if end < 0:
+                return
+            self.state += 1
+
+
+def read_plot_log(path, offset=0, chunk_size=CHUNK_SIZE):
+    """
+    流式解析 plot.log 中 offset 之后的第一条 Plot Info，返回 (x, y, end_offset)，x/y 为 array('d')。
+    end_offset 是这条记录 y 数组 "]" 之后的位置，从它继续读取即得到下一条记录。
+    未找到完整的 Plot Info 时抛出 ValueError。
+    """
+    parser = _PlotParser()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while not parser.done:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            offset += len(data)
+            parser.feed(data)
+    if not parser.done:
+        raise ValueError("日志文件中未找到Plot Info数据")
+    return parser.x, parser.y, offset - len(parser._buf)
+
+
+# 测试用：损坏的对象被跳过，之后的对象照常解析，缓冲区不会累积
+if __name__ == "__main__":
+    import random
+
+    objects = [{"points": [{"coords": [i, i], "value": i / 3}], "name": f"实例-{i}"} for i in range(1000)]
+    valid = "".join(json.dumps(o, ensure_ascii=False) for o in objects)
+    for corrupt in ('{"points": [{"coords": [1, 2}]}', '{"points": tru}', "}", '{"a": "b\x01"}'):
+        data = (corrupt + valid).encode("utf-8")
+        for _ in range(20):
+            decoder = JsonStreamDecoder()
+            got, pos = [], 0
+            while pos < len(data):
+                step = random.randint(1, 300)
+                got += decoder.feed(data[pos:pos + step])
+                pos += step
+            assert [o for o, _ in got] == objects, corrupt
+            assert got[-1][1] == len(data) and decoder.errors == 1 and decoder._text == ""
+
+    # 被块边界截断的对象不算损坏
+    decoder = JsonStreamDecoder()
+    data = valid.encode("utf-8")
+    got = [o for i in range(0, len(data), 7) for o, _ in decoder.feed(data[i:i + 7])]
+    assert got == objects and decoder.errors == 0
+
+    # 一直写不完的对象超过上限后被丢弃，内存有界
+    decoder = JsonStreamDecoder(max_object_size=4096)
+    decoder.feed(b'{"x": "' + b"a" * 10000)
+    decoder.feed(b'"}' + valid.encode("utf-8"))
+    assert len(decoder._text) < 4096 + 1000 and decoder.errors == 1
+    print("✅ JsonStreamDecoder skips corrupt objects")
+
+    # 同一块中有多条 Plot Info：按返回的 end_offset 续读，依次得到每一条
+    import os
+    import tempfile
+    records = [([i, i + 1.5], [i * 10, 100.0]) for i in range(3)]
+    with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False, encoding="utf-8") as f:
+        for xs, ys in records:
+            f.write(f"日志 Plot Info: x: {xs}, y: {ys}\n")
+    for chunk_size in (7, 64, CHUNK_SIZE):
+        offset, got = 0, []
+        for _ in records:
+            xs, ys, offset = read_plot_log(f.name, offset, chunk_size)
+            got.append((list(xs), list(ys)))
+        assert got == records, (chunk_size, got)
+    os.remove(f.name)
+    print("✅ read_plot_log resumes at the end of each record")
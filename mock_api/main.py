@@ -1,13 +1,29 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import re
 import json
 import subprocess
 import os
 from pathlib import Path
 from typing import Optional, List
 from datetime import datetime
+import shutil
+import signal
+import threading
+import time
+import asyncio
+
+import anyio.to_thread
+
+from warm_pool import WarmPool
+from liverun import LiveFlight, LiveRun
+from runs import RunStore
+from logreader import JsonStreamTail, read_plot_log, read_restore_log
+from proclock import ProcessLock
+from results import ResultStore, staleness
+import metrics
+from metrics import timed
 
 
 
@@ -28,6 +44,14 @@ class Hotel(BaseModel):
 class PlotData(BaseModel):
     x: list[float]
     y: list[float]
+    run_id: Optional[str] = None
+    # 结果的来源与新鲜度：restore 为本次请求实测，warm_pool 为预恢复池中的实测结果，
+    # last_known_good 为本次恢复失败后退回的历史结果（stale=True，error 为失败原因）
+    measured_at: Optional[str] = None
+    age_seconds: Optional[float] = None
+    source: Optional[str] = None
+    stale: bool = False
+    error: Optional[str] = None
 
 
 app = FastAPI(title="Mock Hotel API", version="0.1.0")
@@ -39,91 +63,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+metrics.install(app, "mock_api")
 
-def execute_restore_command(restore_mode: str) -> bool:
-    """执行恢复命令（同步版本）"""
-    try:
-        # 构建命令
-        commands = [
-            "cd ~/faststart/mitosis_app",
-            "source ../venv/bin/activate",
-            f"python ./client.py restore --restore_mode {restore_mode} --restore_num 100"
-        ]
-        
-        # 使用bash执行命令
-        full_command = f"bash -c '{'; '.join(commands)}'"
-        
-        # 执行命令
-        result = subprocess.run(
-            full_command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=300  # 5分钟超时
-        )
-        
-        # if result.returncode != 0:
-        #     print(f"命令执行失败: {result.stderr}")
-        #     return False
-            
-        # print(f"命令执行成功: {result.stdout}")
-        return True
-        
-    except subprocess.TimeoutExpired:
-        print("命令执行超时")
-        return False
-    except Exception as e:
-        print(f"执行命令时发生异常: {e}")
-        return False
+# 每次恢复的实例数
+RESTORE_NUM = 100
+
+
+def build_restore_command(restore_mode: str, restore_num: int = RESTORE_NUM) -> str:
+    commands = [
+        "cd ~/faststart/mitosis_app",
+        "source ../venv/bin/activate",
+        f"python ./client.py restore --restore_mode {restore_mode} --restore_num {restore_num}"
+    ]
+    # 使用bash执行命令
+    return f"bash -c '{'; '.join(commands)}'"
 
-def parse_plot_log(file_path: str) -> PlotData:
-    """解析plot.log文件"""
-    try:
-        # 检查文件是否存在
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"日志文件不存在: {file_path}")
-        
-        # 读取文件内容
-        with open(file_path, 'r') as file:
-            content = file.read()
-        
-        # 使用正则表达式匹配Plot Info行
-        pattern = r"Plot Info: x: \[(.*?)\], y: \[(.*?)\]"
-        match = re.search(pattern, content)
-        
-        if not match:
-            raise ValueError("日志文件中未找到Plot Info数据")
-        
-        x_str = match.group(1)
-        y_str = match.group(2)
-        
-        # 解析x和y数组
-        x_list = [float(x.strip()) for x in x_str.split(',') if x.strip()]
-        y_list = [float(y.strip()) for y in y_str.split(',') if y.strip()]
-        
-        return PlotData(x=x_list, y=y_list)
-        
-    except Exception as e:
-        print(f"解析日志文件失败: {e}")
-        # 返回默认数据作为fallback
-        if "para" in file_path:
-            return PlotData(
-                x=[0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 26, 35, 36, 37, 38, 44, 45, 46, 47, 49, 50, 51, 62, 66, 67, 68, 80, 81, 82, 83, 84, 85],
-                y=[5, 10, 16, 20, 25, 27, 30, 34, 38, 39, 40, 45, 49, 50, 52, 54, 56, 57, 62, 66, 69, 71, 73, 74, 78, 80, 87, 90, 94, 96, 98, 100]
-            )
-        else:
-            return PlotData(
-                x=[0, 12, 58, 108, 138, 164, 210, 245, 272, 307, 347, 392, 435, 454, 468, 506, 537, 565, 588, 601, 639, 661, 710, 758, 777, 798, 848, 864, 876, 921, 964, 1014, 1029, 1061, 1096, 1123, 1164, 1198, 1248, 1267, 1309, 1356, 1404, 1418, 1463, 1506, 1528, 1576, 1613, 1639, 1661, 1700, 1715, 1747, 1792, 1822, 1861, 1877, 1897, 1922, 1969, 2002, 2031, 2066, 2114, 2125, 2154, 2204, 2232, 2279, 2290, 2339, 2352, 2389, 2411, 2429, 2455, 2479, 2490, 2540, 2565, 2596, 2615, 2655, 2673, 2703, 2747, 2762, 2784, 2817, 2865, 2880, 2908, 2924, 2962, 2999, 3028, 3040, 3088, 3135],
-                y=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76, 77, 78, 79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 96, 97, 98, 99, 100]
-            )
 
-def write_log_message(message: str):
-    """将日志消息写入spilot.log文件"""
-    log_file = "/app/output/HotelReserve-baseline/spilot.log"
+def parse_plot_log(file_path: str) -> PlotData:
+    """解析plot.log文件；文件不存在或没有 Plot Info 行时抛出异常，不返回任何替代数据"""
+    # 检查文件是否存在
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"日志文件不存在: {file_path}")
     
-    # 确保目录存在
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    # 流式解析Plot Info行
+    with timed("log_parse"):
+        x_arr, y_arr, _ = read_plot_log(file_path)
+    return PlotData(x=x_arr.tolist(), y=y_arr.tolist())
+
+def write_log_message(message: str, log_file: str):
+    """将日志消息写入本次运行的spilot.log文件"""
     
     # 获取当前时间戳
     current_datetime = datetime.now()
@@ -139,35 +107,277 @@ def write_log_message(message: str):
 
 
 
+# 每次调用/恢复使用独立的输出目录，结果按 run_id 查询
+RUNS_DIR = os.environ.get("RUNS_DIR", "/app/output/runs")
+RUNS_RETENTION = int(os.environ.get("RUNS_RETENTION", "200"))
+run_store = RunStore(RUNS_DIR, RUNS_RETENTION)
+
+# mitosis 恢复结果固定写入 /etc/mitosis/，同一时刻只能有一个恢复在写；
+# 恢复完成后立即把结果复制到本次运行的目录，解析和后续读取都不再依赖共享文件。
+# 多 worker 部署时各进程通过同一个锁文件互斥
+MITOSIS_DIR = "/etc/mitosis"
+MITOSIS_FILES = ("plot.log", "restore.log")
+MITOSIS_LOCK = os.environ.get("MITOSIS_LOCK", "/tmp/mitosis-restore.lock")
+_restore_lock = ProcessLock(MITOSIS_LOCK)
+
+
+def clear_mitosis_output():
+    """先清掉上一次的结果，避免本次恢复未产出时误拷旧文件"""
+    for name in MITOSIS_FILES:
+        try:
+            os.remove(os.path.join(MITOSIS_DIR, name))
+        except FileNotFoundError:
+            pass
+
+
+def collect_mitosis_output(run_dir: str):
+    for name in MITOSIS_FILES:
+        src = os.path.join(MITOSIS_DIR, name)
+        if os.path.exists(src):
+            shutil.copyfile(src, os.path.join(run_dir, name))
+
+
+# 每种模式保留最近 RESULTS_KEEP 次真实恢复的结果，恢复失败时退回最近一次并标为过期
+RESULTS_KEEP = int(os.environ.get("RESULTS_KEEP", "10"))
+result_store = ResultStore(RESULTS_KEEP)
+
+
+def finish_run(restore_mode: str, run_id: str, run_dir: str, measured_at: float = None) -> PlotData:
+    """解析本次运行的 plot.log，并记入结果库"""
+    plot = parse_plot_log(os.path.join(run_dir, "plot.log"))
+    measured_at = time.time() if measured_at is None else measured_at
+    plot.run_id = run_id
+    plot.measured_at = staleness(measured_at)["measured_at"]
+    result_store.record(restore_mode, plot, measured_at)
+    return plot
+
+
+# 单次恢复的超时时间（秒）
+RESTORE_TIMEOUT = 300
+RESTORE_POLL_INTERVAL = 0.02
+
+
+def start_restore(restore_mode: str, restore_num: int = RESTORE_NUM) -> LiveRun:
+    """在后台线程中开始一次恢复，立即返回 LiveRun；进度以 start/point 事件发布"""
+    run = LiveRun()
+    threading.Thread(
+        target=run_restore, args=(run, restore_mode, restore_num),
+        name=f"restore-{restore_mode}", daemon=True,
+    ).start()
+    return run
+
+
+def run_restore(run: LiveRun, restore_mode: str, restore_num: int):
+    try:
+        run.finish(result=restore_and_parse(run, restore_mode, restore_num))
+    except Exception as e:
+        run.finish(error=e)
+
+
+def _stderr_tail(path: str, size: int = 500) -> str:
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(0, os.path.getsize(path) - size))
+            return f.read().decode(errors="replace")
+    except OSError:
+        return ""
+
+
+def restore_and_parse(run: LiveRun, restore_mode: str, restore_num: int) -> PlotData:
+    """
+    执行一次恢复并解析结果，失败时抛出 RuntimeError。
+    restore.log 每完成一个实例追加一个 JSON 对象，增量读取即可得到实时进度：
+    每恢复一个实例发布一个 point 事件，x 为从第一个实例恢复完成起的毫秒数（与 plot.log 一致），
+    y 为已恢复实例的百分比。
+    """
+    run_id, run_dir = run_store.create(restore_mode)
+    run.publish("start", {"run_id": run_id, "restore_mode": restore_mode, "restore_num": restore_num})
+
+    error = None
+    with _restore_lock:
+        if run.cancelled:
+            metrics.RESTORES.labels(restore_mode, "cancelled").inc()
+            raise RuntimeError("没有客户端在等待，恢复已取消")
+        clear_mitosis_output()
+        tail = JsonStreamTail(os.path.join(MITOSIS_DIR, "restore.log"))
+        # stderr 写到文件而不是管道：运行期间不读取，管道写满会让子进程卡住
+        stderr_file = os.path.join(run_dir, "stderr.log")
+        start = time.monotonic()
+        with open(stderr_file, "wb") as stderr:
+            proc = subprocess.Popen(
+                build_restore_command(restore_mode, restore_num),
+                shell=True,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr,
+                start_new_session=True,
+            )
+
+        def kill():
+            # 结束整个进程组（bash 及其启动的 client.py）
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        if not run.set_canceller(kill):
+            kill()
+        first = None
+        restored = 0
+        outcome = "failure"
+        try:
+            while True:
+                exited = proc.poll() is not None
+                for _ in tail.poll():
+                    now = time.monotonic()
+                    first = now if first is None else first
+                    restored += 1
+                    run.publish("point", {
+                        "x": round((now - first) * 1000),
+                        "y": round(restored * 100 / restore_num, 2),
+                    })
+                if exited:
+                    if run.cancelled:
+                        outcome = "cancelled"
+                        error = "客户端已全部断开，恢复被取消"
+                    elif proc.returncode == 0:
+                        outcome = "success"
+                    else:
+                        error = f"返回码 {proc.returncode}: {_stderr_tail(stderr_file)}"
+                    break
+                if time.monotonic() - start > RESTORE_TIMEOUT:
+                    outcome = "timeout"
+                    error = "恢复命令执行超时"
+                    break
+                time.sleep(RESTORE_POLL_INTERVAL)
+        finally:
+            metrics.PHASE_LATENCY.labels("restore_subprocess").observe(time.monotonic() - start)
+            metrics.RESTORES.labels(restore_mode, outcome).inc()
+            # 超时或出错退出循环时确保子进程退出，锁释放后不再有进程写 /etc/mitosis
+            if proc.poll() is None:
+                kill()
+                proc.wait()
+        collect_mitosis_output(run_dir)
+
+    if error is not None:
+        raise RuntimeError(f"恢复命令执行失败 ({restore_mode}): {error}")
+    try:
+        return finish_run(restore_mode, run_id, run_dir)
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"plot.log 解析失败 ({restore_mode}): {e}")
+
+
+def load_recent_results():
+    """启动时从最近的运行目录中补录各模式的历史结果，重启后也有可退回的数据"""
+    for mode in ("parallel", "sequential"):
+        loaded = 0
+        for run_id in run_store.list(mode):
+            if loaded >= RESULTS_KEEP:
+                break
+            run_dir = run_store.path(run_id)
+            try:
+                finish_run(mode, run_id, run_dir, os.path.getmtime(os.path.join(run_dir, "plot.log")))
+            except (OSError, ValueError):
+                continue
+            loaded += 1
+
+
+def fresh(plot: PlotData, source: str, stale: bool = False, error: str = None) -> PlotData:
+    """附上来源和新鲜度后返回副本（缓存中的对象被多个请求共享，不能直接修改）"""
+    measured_at = datetime.fromisoformat(plot.measured_at).timestamp()
+    return plot.copy(update={"source": source, "stale": stale, "error": error, **staleness(measured_at)})
+
+
+def last_known_good(restore_mode: str, error: str) -> PlotData:
+    """本次恢复失败：返回最近一次真实结果并标为过期；一次都没有时返回 503"""
+    latest = result_store.latest(restore_mode)
+    if latest is None:
+        raise HTTPException(status_code=503, detail=f"恢复失败且没有可用的历史结果: {error}")
+    metrics.RESTORE_FALLBACK.labels(restore_mode).inc()
+    return fresh(latest[1], "last_known_good", stale=True, error=error)
+
+
+# 相同参数的并发恢复请求合并为一次；结果缓存 RESTORE_CACHE_TTL 秒
+RESTORE_CACHE_TTL = float(os.environ.get("RESTORE_CACHE_TTL", "2"))
+restore_flight = LiveFlight(ttl=RESTORE_CACHE_TTL)
+
+
+def coalesced_restore(restore_mode: str, restore_num: int = RESTORE_NUM) -> LiveRun:
+    """加入执行中的同参数恢复，没有时新开一个；流式接口和普通接口共用"""
+    return restore_flight.join(
+        (restore_mode, restore_num),
+        lambda: start_restore(restore_mode, restore_num),
+    )
+
+
+# 快速启动的预恢复实例池
+WARM_POOL_SIZE = int(os.environ.get("WARM_POOL_SIZE", "1"))
+WARM_POOL_MAX_AGE = float(os.environ.get("WARM_POOL_MAX_AGE", "600"))
+
+quick_start_pool = WarmPool(
+    "parallel",
+    lambda: start_restore("parallel"),
+    size=WARM_POOL_SIZE,
+    max_age=WARM_POOL_MAX_AGE,
+)
+
+
+# 同步接口在线程池中执行，/invoke 和恢复接口会在 subprocess 上阻塞整个请求期间，
+# 线程池上限决定了单个 worker 能同时挂起多少个这样的请求
+THREADPOOL_SIZE = int(os.environ.get("THREADPOOL_SIZE", "40"))
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
+@app.on_event("startup")
+def start_warm_pool():
+    load_recent_results()
+    quick_start_pool.start()
+
+
+@app.on_event("shutdown")
+def stop_warm_pool():
+    quick_start_pool.stop()
+
+
+@app.get("/warm-pool/stats")
+def get_warm_pool_stats():
+    """预恢复池状态：无需等待的命中、需等待补充完成的命中、未命中次数等，以及请求合并的统计"""
+    return {**quick_start_pool.stats(), "coalescing": restore_flight.stats()}
+
+
 @app.post("/invoke")
-def invoke(req: InvokeRequest) -> List[Hotel]:
+def invoke(req: InvokeRequest, response: Response) -> List[Hotel]:
     
-    log_file = "/app/output/HotelReserve-baseline/spilot.log"
-    with open(log_file, "w", encoding="utf-8") as f:
-        pass
+    run_id, run_dir = run_store.create("invoke")
+    log_file = os.path.join(run_dir, "spilot.log")
+    response.headers["X-Run-Id"] = run_id
     
     # 判断是否使用快速启动
     is_fast_start = req.provider == "fast_start"
     
     if is_fast_start:
         # 快速启动模式
-        write_log_message("Fast start toggled, initiating high-performance instance deployment from snapshots...")
-        cmd = "source ~/faasit/demo-202405/venv/bin/activate;cd /root/projects/HotelReserve;ft invoke -p fast_start >> /app/output/HotelReserve-baseline/spilot.log 2> /dev/null"
+        write_log_message("Fast start toggled, initiating high-performance instance deployment from snapshots...", log_file)
+        cmd = f"source ~/faasit/demo-202405/venv/bin/activate;cd /root/projects/HotelReserve;ft invoke -p fast_start >> {log_file} 2> /dev/null"
     else:
         # 普通启动模式
-        write_log_message("Using default start approach...")
-        cmd = "source ~/faasit/demo-202405/venv/bin/activate;cd /root/projects/HotelReserve;ft invoke -p baseline_start >> /app/output/HotelReserve-baseline/spilot.log 2> /dev/null"
+        write_log_message("Using default start approach...", log_file)
+        cmd = f"source ~/faasit/demo-202405/venv/bin/activate;cd /root/projects/HotelReserve;ft invoke -p baseline_start >> {log_file} 2> /dev/null"
     
     try:
         # 使用bash执行命令，因为包含source命令
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            executable="/bin/bash",
-            capture_output=True,
-            text=True,
-            timeout=30  # 设置30秒超时
-        )
+        with timed("ft_invoke"):
+            result = subprocess.run(
+                cmd,
+                shell=True,
+                executable="/bin/bash",
+                capture_output=True,
+                text=True,
+                timeout=30  # 设置30秒超时
+            )
         
         # 检查命令执行结果
         if result.returncode != 0:
@@ -176,9 +386,9 @@ def invoke(req: InvokeRequest) -> List[Hotel]:
         else:
             print("命令执行成功")
             if is_fast_start:
-                write_log_message("Fast start completed successfully. Check /etc/mitosis for results.")
+                write_log_message(f"Fast start completed successfully. Check run {run_id} for results.", log_file)
             else:
-                write_log_message("Baseline start completed successfully.")
+                write_log_message("Baseline start completed successfully.", log_file)
             
     except subprocess.TimeoutExpired:
         print("命令执行超时")
@@ -196,40 +406,132 @@ def invoke(req: InvokeRequest) -> List[Hotel]:
     return hotels
 
 
+def acquire_quick_start():
+    """优先取预恢复好的实例，池为空时加入/开始一次恢复；返回 (LiveRun, 来源)"""
+    source = "warm_pool"
+
+    def cold():
+        nonlocal source
+        source = "restore"
+        return coalesced_restore("parallel")
+
+    return quick_start_pool.acquire(cold=cold), source
+
+
+def restore_result(restore_mode: str, run: LiveRun, source: str) -> PlotData:
+    """等待恢复结束；失败时退回最近一次真实结果"""
+    try:
+        return fresh(run.result(), source)
+    except Exception as e:
+        return last_known_good(restore_mode, str(e))
+
+
 @app.get("/hotel-search/quick-start")
 def get_quick_start_data() -> PlotData:
     """获取快速启动数据（并行恢复模式）"""
-    try:
-        # 执行快速启动命令
-        success = execute_restore_command("parallel")
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="快速启动命令执行失败")
-        
-        # 从标准路径获取结果
-        file_path = "/etc/mitosis/plot.log"
-        return parse_plot_log(file_path)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取快速启动数据失败: {str(e)}")
+    return restore_result("parallel", *acquire_quick_start())
 
 
 @app.get("/hotel-search/normal-start")
 def get_normal_start_data() -> PlotData:
     """获取普通启动数据（顺序恢复模式）"""
+    return restore_result("sequential", coalesced_restore("sequential"), "restore")
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_restore(request: Request, restore_mode: str, run: LiveRun, source: str):
+    """
+    以 SSE 推送一次恢复的进度：先回放已发布的 start/point 事件，之后实时推送新事件；
+    结束后推送 done 事件，内容为 plot.log 中的完整曲线。
+    恢复失败时 done 事件为最近一次真实结果（stale=True），一次都没有时推送 error 事件。
+    客户端断开后不再持有这次恢复，没有其他请求在等它时恢复进程组会被终止。
+    """
+    run.attach()
     try:
-        # 执行普通启动命令
-        success = execute_restore_command("sequential")
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="普通启动命令执行失败")
-        
-        # 从标准路径获取结果
-        file_path = "/etc/mitosis/plot.log"
-        return parse_plot_log(file_path)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取普通启动数据失败: {str(e)}")
+        index = 0
+        while True:
+            events, done = run.events_since(index)
+            index += len(events)
+            for event, data in events:
+                yield sse_event(event, data)
+            if done:
+                break
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(RESTORE_POLL_INTERVAL)
+
+        if run.failed:
+            try:
+                plot = last_known_good(restore_mode, str(run.error))
+            except HTTPException as e:
+                yield sse_event("error", {"detail": e.detail})
+                return
+        else:
+            plot = fresh(run.result(), source)
+        yield sse_event("done", plot.dict())
+    finally:
+        run.detach()
+
+
+def sse_response(events):
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/hotel-search/quick-start/stream")
+async def stream_quick_start(request: Request):
+    """快速启动（并行恢复），以 SSE 实时推送恢复进度；与普通接口共用预恢复池和请求合并"""
+    run, source = acquire_quick_start()
+    return sse_response(stream_restore(request, "parallel", run, source))
+
+
+@app.get("/hotel-search/normal-start/stream")
+async def stream_normal_start(request: Request):
+    """普通启动（顺序恢复），以 SSE 实时推送恢复进度；同时到达的请求共享同一次恢复"""
+    return sse_response(stream_restore(request, "sequential", coalesced_restore("sequential"), "restore"))
+
+
+@app.get("/restore-results/{restore_mode}")
+def get_restore_results(restore_mode: str):
+    """某种模式最近的真实恢复结果（新的在前）：完成时间、距今秒数、总耗时"""
+    now = time.time()
+    return [
+        {
+            "run_id": plot.run_id,
+            **staleness(measured_at, now),
+            "total_ms": plot.x[-1] if plot.x else None,
+            "points": len(plot.x),
+        }
+        for measured_at, plot in result_store.history(restore_mode)
+    ]
+
+
+@app.get("/runs/{run_id}")
+def get_run(run_id: str):
+    """按 run_id 查询某次调用/恢复的输出"""
+    run_dir = run_store.path(run_id)
+    if run_dir is None:
+        raise HTTPException(status_code=404, detail=f"运行记录不存在: {run_id}")
+
+    result = {"run_id": run_id, "files": sorted(os.listdir(run_dir))}
+    log_file = os.path.join(run_dir, "spilot.log")
+    if os.path.exists(log_file):
+        with open(log_file, "r", encoding="utf-8", errors="replace") as f:
+            result["log"] = f.read()
+    plot_file = os.path.join(run_dir, "plot.log")
+    if os.path.exists(plot_file):
+        try:
+            result["plot"] = parse_plot_log(plot_file)
+        except ValueError as e:
+            result["plot_error"] = str(e)
+    restore_file = os.path.join(run_dir, "restore.log")
+    if os.path.exists(restore_file):
+        with timed("log_parse"):
+            result["restored_instances"] = read_restore_log(restore_file).instances
+    return result
 
 
 # To run locally:
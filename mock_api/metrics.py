@@ -0,0 +1,127 @@
+"""
+Prometheus 指标：每个接口的延迟直方图和进行中请求数，各内部阶段（恢复、日志解析、
+目录加载、地名解析、近邻搜索等）的耗时，以及恢复结果计数。
+mock_api 的各个服务和 frontend/mock-backend 的酒店搜索 API 共用本模块
+（后者与 backend/profile 一样通过 sys.path 导入 mock_api 下的模块）。
+
+    install(app, "hotel")     # 挂上中间件和 GET /metrics
+    with timed("log_parse"):  # 记录一个阶段的耗时
+        ...
+
+多 worker（serve.py --workers N）时设置 PROMETHEUS_MULTIPROC_DIR，
+/metrics 会汇总所有 worker 及搜索进程池的数据；serve.py 未设置时会自动创建一个临时目录。
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from starlette.routing import Match
+
+MULTIPROC = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时",
+    ["app", "route", "method", "status"],
+    # 覆盖毫秒级的搜索请求到分钟级的恢复请求
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "正在处理的 HTTP 请求数", ["app", "route"],
+    multiprocess_mode="livesum",
+)
+PHASE_LATENCY = Histogram(
+    "phase_duration_seconds", "内部阶段耗时", ["phase"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5,
+             1, 2.5, 5, 10, 30, 60, 300),
+)
+# 以下只由 mock_api 的恢复接口使用
+RESTORES = Counter(
+    "restore_total", "恢复命令执行次数", ["mode", "outcome"],  # outcome: success / failure / timeout / cancelled
+)
+RESTORE_FALLBACK = Counter(
+    "restore_fallback_served_total", "恢复失败时返回历史结果（last known good）的次数", ["mode"],
+)
+
+
+_phases = {}
+
+
+@contextmanager
+def timed(phase):
+    child = _phases.get(phase)
+    if child is None:
+        child = _phases[phase] = PHASE_LATENCY.labels(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        child.observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    纯 ASGI 中间件：不包装响应体，流式响应（SSE）也按整个连接计时。
+    路由标签使用路由模板（如 /runs/{run_id}），避免路径参数导致标签无限增长。
+    """
+
+    def __init__(self, app, app_name, router):
+        self.app = app
+        self.app_name = app_name
+        self.router = router
+        self._routes = {}   # (method, path) -> 路由模板，只缓存无路径参数的路由
+
+    def _route_of(self, scope):
+        key = (scope["method"], scope["path"])
+        cached = self._routes.get(key)
+        if cached is not None:
+            return cached
+        for route in self.router.routes:
+            match, child = route.matches(scope)
+            if match == Match.FULL:
+                if not child.get("path_params"):
+                    self._routes[key] = route.path
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_of(scope)
+        in_flight = HTTP_IN_FLIGHT.labels(self.app_name, route)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            HTTP_LATENCY.labels(self.app_name, route, scope["method"], str(status)).observe(
+                time.perf_counter() - start
+            )
+
+
+def metrics_endpoint():
+    if MULTIPROC:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def install(app, app_name):
+    app.add_middleware(MetricsMiddleware, app_name=app_name, router=app.router)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
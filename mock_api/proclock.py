@@ -0,0 +1,60 @@
+import asyncio
+import contextlib
+import fcntl
+import os
+import threading
+
+
+class ProcessLock:
+    """
+    同时在线程和进程之间互斥的锁：进程内用 threading.Lock，进程间用 flock。
+    多个 uvicorn worker 共用同一个锁文件，保证同一时刻只有一个恢复在写 /etc/mitosis。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+        except BaseException:
+            self._lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        fd, self._fd = self._fd, None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        finally:
+            self._lock.release()
+
+    @contextlib.asynccontextmanager
+    async def hold_async(self):
+        """
+        在协程中持锁：在线程中等待加锁，不阻塞事件循环。
+        等待期间被取消时，线程拿到锁后立即释放，不会把锁泄漏掉。
+        """
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.__enter__))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(
+                lambda f: f.exception() is None and self.__exit__(None, None, None)
+            )
+            raise
+        try:
+            yield self
+        finally:
+            self.__exit__(None, None, None)
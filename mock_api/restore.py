@@ -1,12 +1,17 @@
-import subprocess
-import requests
+import os
+import signal
 import logging
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import asyncio
+import time
 import aiohttp
 
+import metrics
+from metrics import timed
+from proclock import ProcessLock
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,6 +26,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+metrics.install(app, "restore")
 
 class FtInvokeRequest(BaseModel):
     app_id: int
@@ -35,79 +41,232 @@ class FtInvokeResponse(BaseModel):
     error: str = None
     restore_log: str = None
 
-def run_restore_command():
-    """执行恢复命令"""
-    try:
-        logger.info("开始执行恢复命令...")
-        
-        # 构造完整的命令
-        commands = [
-            "cd ~/faststart/mitosis_app",
-            "source ../venv/bin/activate",
-            "python ./client.py restore --restore_mode parallel --restore_num 100"
-        ]
-        
-        full_command = " && ".join(commands)
-        
-        # 使用shell执行命令
-        result = subprocess.run(
-            full_command,
-            shell=True,
-            executable="/bin/bash",
-            capture_output=True,
-            text=True,
-            timeout=300  # 5分钟超时
-        )
-        
-        if result.returncode == 0:
-            logger.info("恢复命令执行成功")
-            return True, result.stdout
-        else:
-            logger.error(f"恢复命令执行失败: {result.stderr}")
-            return False, result.stderr
-            
-    except subprocess.TimeoutExpired:
-        error_msg = "恢复命令执行超时"
-        logger.error(error_msg)
-        return False, error_msg
-    except Exception as e:
-        error_msg = f"执行恢复命令时发生异常: {str(e)}"
-        logger.error(error_msg)
-        return False, error_msg
+# 恢复命令
+RESTORE_COMMAND = " && ".join([
+    "cd ~/faststart/mitosis_app",
+    "source ../venv/bin/activate",
+    "python ./client.py restore --restore_mode parallel --restore_num 100"
+])
+RESTORE_TIMEOUT = 300  # 5分钟超时
+# 同时在本进程中排队或运行的恢复请求数上限
+MAX_CONCURRENT_RESTORES = int(os.environ.get("MAX_CONCURRENT_RESTORES", "2"))
+# 恢复命令写本机固定的 /etc/mitosis：与 main.py、profile.py 共用同一个锁文件，
+# 同一时刻只有一个恢复在运行，不会覆盖别人的输出
+MITOSIS_LOCK = os.environ.get("MITOSIS_LOCK", "/tmp/mitosis-restore.lock")
+_restore_lock = ProcessLock(MITOSIS_LOCK)
 
-async def call_ft_invoke(request_data: dict) -> dict:
-    """调用原始的ft/invoke接口"""
-    try:
-        # 原始后端地址
-        target_url = "http://8.130.87.93:8328/ft/invoke"
-        
-        timeout = aiohttp.ClientTimeout(total=60)  # 60秒超时
-        
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(
-                target_url,
-                json=request_data,
-                headers={"Content-Type": "application/json"}
-            ) as response:
-                
-                if response.status == 200:
-                    return await response.json()
+_restore_semaphore = None
+
+
+def get_restore_semaphore() -> asyncio.Semaphore:
+    """在事件循环中惰性创建信号量"""
+    global _restore_semaphore
+    if _restore_semaphore is None:
+        _restore_semaphore = asyncio.Semaphore(MAX_CONCURRENT_RESTORES)
+    return _restore_semaphore
+
+
+async def _drain(stream: asyncio.StreamReader, name: str, sink: list):
+    """逐行读取子进程输出，边读边记录，避免管道写满阻塞子进程"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        text = line.decode(errors="replace")
+        sink.append(text)
+        logger.debug(f"[restore {name}] {text.rstrip()}")
+
+
+async def _kill(proc: asyncio.subprocess.Process):
+    """结束整个进程组（bash 及其启动的 client.py）"""
+    if proc.returncode is None:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+
+
+async def run_restore_command():
+    """执行恢复命令（异步子进程，不阻塞事件循环）"""
+    async with get_restore_semaphore():
+        async with _restore_lock.hold_async():
+            logger.info("开始执行恢复命令...")
+            proc = None
+            stdout, stderr = [], []
+            start = time.perf_counter()
+            outcome = "failure"
+            try:
+                proc = await asyncio.create_subprocess_shell(
+                    RESTORE_COMMAND,
+                    executable="/bin/bash",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+                await asyncio.wait_for(
+                    asyncio.gather(
+                        _drain(proc.stdout, "stdout", stdout),
+                        _drain(proc.stderr, "stderr", stderr),
+                        proc.wait(),
+                    ),
+                    timeout=RESTORE_TIMEOUT,
+                )
+
+                if proc.returncode == 0:
+                    outcome = "success"
+                    logger.info("恢复命令执行成功")
+                    return True, "".join(stdout)
                 else:
-                    error_text = await response.text()
-                    raise Exception(f"HTTP {response.status}: {error_text}")
-                    
-    except Exception as e:
-        logger.error(f"调用ft/invoke接口失败: {str(e)}")
+                    logger.error(f"恢复命令执行失败: {''.join(stderr)}")
+                    return False, "".join(stderr)
+
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                await _kill(proc)
+                error_msg = "恢复命令执行超时"
+                logger.error(error_msg)
+                return False, error_msg
+            except asyncio.CancelledError:
+                # 客户端断开或服务关闭：结束子进程后继续向上抛出
+                outcome = "cancelled"
+                if proc is not None:
+                    await _kill(proc)
+                logger.warning("恢复命令已取消")
+                raise
+            except Exception as e:
+                if proc is not None:
+                    await _kill(proc)
+                error_msg = f"执行恢复命令时发生异常: {str(e)}"
+                logger.error(error_msg)
+                return False, error_msg
+            finally:
+                metrics.PHASE_LATENCY.labels("restore_subprocess").observe(time.perf_counter() - start)
+                metrics.RESTORES.labels("parallel", outcome).inc()
+
+
+async def run_restore_until_disconnect(request: Request):
+    """
+    执行恢复命令，同时轮询客户端连接；客户端断开则取消恢复。
+    返回 None 表示已取消。
+    """
+    task = asyncio.create_task(run_restore_command())
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=0.5)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.warning("客户端已断开，取消恢复命令")
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return None
+    except asyncio.CancelledError:
+        task.cancel()
         raise
 
+# 原始后端地址及连接池配置
+FT_INVOKE_URL = os.environ.get("FT_INVOKE_URL", "http://8.130.87.93:8328/ft/invoke")
+FT_TIMEOUT = float(os.environ.get("FT_TIMEOUT", "60"))  # 60秒超时
+FT_POOL_LIMIT = int(os.environ.get("FT_POOL_LIMIT", "100"))  # 连接池总连接数
+FT_POOL_LIMIT_PER_HOST = int(os.environ.get("FT_POOL_LIMIT_PER_HOST", "20"))
+FT_KEEPALIVE = float(os.environ.get("FT_KEEPALIVE", "30"))  # 空闲连接保活秒数
+FT_MAX_RETRIES = int(os.environ.get("FT_MAX_RETRIES", "2"))
+FT_RETRY_BACKOFF = float(os.environ.get("FT_RETRY_BACKOFF", "0.2"))  # 首次重试等待秒数，之后翻倍
+
+# /ft/invoke 不是幂等的，只重试确定没有到达后端的请求（连接没有建立）。
+# 502/504 和连接中途断开时后端可能已经开始执行，重试会导致执行两次，因此不重试。
+# 只有确认后端返回 503 时一定没有处理请求，才把 503 加进 FT_RETRY_STATUS（逗号分隔）
+RETRYABLE_STATUS = {int(s) for s in os.environ.get("FT_RETRY_STATUS", "").split(",") if s.strip()}
+
+_ft_session = None
+
+
+def create_ft_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=FT_POOL_LIMIT,
+        limit_per_host=FT_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=FT_KEEPALIVE,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=FT_TIMEOUT),
+    )
+
+
+@app.on_event("startup")
+async def open_ft_session():
+    global _ft_session
+    _ft_session = create_ft_session()
+
+
+@app.on_event("shutdown")
+async def close_ft_session():
+    global _ft_session
+    if _ft_session is not None:
+        await _ft_session.close()
+        _ft_session = None
+
+
+class RetryableError(Exception):
+    pass
+
+
+async def _post_once(session: aiohttp.ClientSession, request_data: dict) -> dict:
+    try:
+        async with session.post(
+            FT_INVOKE_URL,
+            json=request_data,
+            headers={"Content-Type": "application/json"}
+        ) as response:
+
+            if response.status == 200:
+                return await response.json()
+            error_text = await response.text()
+            if response.status in RETRYABLE_STATUS:
+                raise RetryableError(f"HTTP {response.status}: {error_text}")
+            raise Exception(f"HTTP {response.status}: {error_text}")
+    except aiohttp.ClientConnectorError as e:
+        # 连接未建立：请求一定没有到达后端
+        raise RetryableError(str(e)) from e
+
+
+async def call_ft_invoke(request_data: dict, session: aiohttp.ClientSession = None) -> dict:
+    """调用原始的ft/invoke接口（复用应用级连接池，失败时指数退避重试）"""
+    session = session or _ft_session
+    if session is None:
+        raise RuntimeError("ft/invoke 会话尚未初始化")
+    delay = FT_RETRY_BACKOFF
+    for attempt in range(FT_MAX_RETRIES + 1):
+        try:
+            with timed("ft_forward"):
+                return await _post_once(session, request_data)
+        except RetryableError as e:
+            if attempt == FT_MAX_RETRIES:
+                logger.error(f"调用ft/invoke接口失败（已重试{attempt}次）: {str(e)}")
+                raise
+            logger.warning(f"调用ft/invoke接口失败，{delay:.1f}s 后重试: {str(e)}")
+            await asyncio.sleep(delay)
+            delay *= 2
+        except Exception as e:
+            logger.error(f"调用ft/invoke接口失败: {str(e)}")
+            raise
+
 @app.post("/restore", response_model=FtInvokeResponse)
-async def hotel_reserve_endpoint(request: FtInvokeRequest):
+async def hotel_reserve_endpoint(request: FtInvokeRequest, raw_request: Request):
     """酒店预订端点 - 先执行恢复命令，再调用原始接口"""
     try:
         # 第一步：执行恢复命令
         logger.info(f"开始处理酒店预订请求: {request.dict()}")
         
-        restore_success, restore_log = run_restore_command()
+        restored = await run_restore_until_disconnect(raw_request)
+        if restored is None:
+            return FtInvokeResponse(success=False, error="客户端已断开，恢复已取消")
+        restore_success, restore_log = restored
         
         if not restore_success:
             return FtInvokeResponse(
@@ -146,9 +305,12 @@ async def health_check():
     return {"status": "healthy", "service": "hotel-reserve-service"}
 
 @app.post("/test-restore")
-async def test_restore_command():
+async def test_restore_command(raw_request: Request):
     """测试恢复命令的独立端点"""
-    success, log = run_restore_command()
+    restored = await run_restore_until_disconnect(raw_request)
+    if restored is None:
+        return {"success": False, "log": "客户端已断开，恢复已取消"}
+    success, log = restored
     return {
         "success": success,
         "log": log
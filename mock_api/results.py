@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class ResultStore:
+    """
+    每种恢复模式保留最近 keep 次真实恢复的结果及其完成时间。
+    本次恢复失败时可以退回最近一次成功的结果，但调用方必须把它标为过期数据返回。
+    """
+
+    def __init__(self, keep=10):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._results = {}  # mode -> deque[(measured_at, item)]，新的在右边
+
+    def record(self, mode, item, measured_at=None):
+        """measured_at 为 Unix 时间戳，默认当前时间"""
+        measured_at = time.time() if measured_at is None else measured_at
+        with self._lock:
+            results = self._results.setdefault(mode, deque(maxlen=self.keep))
+            results.append((measured_at, item))
+            if len(results) > 1 and results[-2][0] > measured_at:
+                # 从磁盘补录旧结果时可能乱序，保持按时间排列
+                ordered = sorted(results, key=lambda r: r[0])
+                results.clear()
+                results.extend(ordered)
+
+    def latest(self, mode):
+        """返回 (measured_at, item)，没有结果时返回 None"""
+        with self._lock:
+            results = self._results.get(mode)
+            return results[-1] if results else None
+
+    def history(self, mode):
+        """最近的结果在前"""
+        with self._lock:
+            return list(reversed(self._results.get(mode, ())))
+
+
+def staleness(measured_at, now=None):
+    """结果的时间元数据：测量时间（ISO 格式）和距今秒数"""
+    now = time.time() if now is None else now
+    return {
+        "measured_at": datetime.fromtimestamp(measured_at).isoformat(timespec="milliseconds"),
+        "age_seconds": round(now - measured_at, 3),
+    }
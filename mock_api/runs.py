@@ -0,0 +1,59 @@
+import os
+import re
+import shutil
+import threading
+import uuid
+from datetime import datetime
+
+
+_RUN_ID = re.compile(r"^[a-z]+-\d{14}-[0-9a-f]{8}$")
+
+
+class RunStore:
+    """
+    每次调用/恢复一个独立的输出目录：<root>/<run_id>/。
+    只保留最近 retention 个目录，旧的在创建新目录时清理。
+    """
+
+    def __init__(self, root, retention=200):
+        self.root = root
+        self.retention = retention
+        self._lock = threading.Lock()
+
+    def create(self, kind: str):
+        """新建运行目录，返回 (run_id, 目录路径)"""
+        run_id = f"{kind}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.root, run_id)
+        os.makedirs(path)
+        self.cleanup()
+        return run_id, path
+
+    def path(self, run_id: str):
+        """run_id 对应的目录；格式非法或不存在时返回 None"""
+        if not _RUN_ID.match(run_id):
+            return None
+        path = os.path.join(self.root, run_id)
+        return path if os.path.isdir(path) else None
+
+    def list(self, kind=None):
+        """已有的 run_id，新的在前；kind 不为 None 时只列出该类型"""
+        try:
+            names = [e.name for e in os.scandir(self.root) if e.is_dir() and _RUN_ID.match(e.name)]
+        except FileNotFoundError:
+            return []
+        if kind is not None:
+            names = [n for n in names if n.split("-", 1)[0] == kind]
+        # run_id 中的时间戳精确到秒，同一秒内的顺序不重要
+        return sorted(names, key=lambda n: n.split("-")[1], reverse=True)
+
+    def cleanup(self):
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.root) if e.is_dir() and _RUN_ID.match(e.name)]
+            except FileNotFoundError:
+                return
+            if len(entries) <= self.retention:
+                return
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for e in entries[:len(entries) - self.retention]:
+                shutil.rmtree(e.path, ignore_errors=True)
@@ -0,0 +1,49 @@
+"""
+多进程启动 mock API：
+
+    python serve.py --workers 4 --port 8000
+
+各 worker 通过 MITOSIS_LOCK 锁文件互斥地使用 /etc/mitosis，恢复不会互相覆盖输出。
+预恢复池按 worker 各自维护，总共会保持 workers * WARM_POOL_SIZE 个预恢复实例，
+worker 较多时可相应调小 --warm-pool。
+"""
+import argparse
+import os
+import socket
+import tempfile
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程启动 mock API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--warm-pool", type=int, default=None, help="每个 worker 的预恢复池大小")
+    parser.add_argument("--threadpool", type=int, default=None, help="每个 worker 的同步接口线程数")
+    args = parser.parse_args()
+
+    # worker 进程在导入 main 模块时读取这些环境变量
+    if args.warm_pool is not None:
+        os.environ["WARM_POOL_SIZE"] = str(args.warm_pool)
+    if args.threadpool is not None:
+        os.environ["THREADPOOL_SIZE"] = str(args.threadpool)
+    if args.workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # 多 worker 时 /metrics 需要从共享目录汇总各 worker 的指标
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="mock-api-metrics-")
+
+    print(f"🚀 {args.workers} workers on {args.host}:{args.port}")
+    if args.workers <= 1:
+        uvicorn.run("main:app", host=args.host, port=args.port)
+        return
+    # 与 frontend/mock-backend/serve.py 相同：自己创建监听 socket 并设置 TCP_NODELAY，
+    # 否则多 worker 下的连接没有 TCP_NODELAY，每个响应多出约 40ms
+    sock = socket.create_server((args.host, args.port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.set_inheritable(True)
+    uvicorn.run("main:app", fd=sock.fileno(), workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
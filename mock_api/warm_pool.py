@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+
+
+class WarmPool:
+    """
+    预恢复实例池：后台线程提前执行恢复，使池中始终保持 size 个实例。
+    produce() 开始一次恢复并立即返回句柄（LiveRun），句柄一创建就放进池里，
+    因此正在补充的实例也能被取走：请求到来时取走最早的一个，
+    只有池完全为空时才由调用方冷恢复（未命中），不会和补充中的恢复争抢同一把锁。
+    取走后由后台线程异步补齐。
+    命中分两种计数：hits 取走的实例已经恢复好，请求无需等待；
+    waited_hits 取走的实例仍在恢复中，请求还要等它恢复完（比冷恢复等得少）。
+    """
+
+    def __init__(self, name, produce, size, max_age=None):
+        self.name = name
+        self.produce = produce      # () -> 句柄，有 wait()、done 和 failed
+        self.size = size
+        self.max_age = max_age      # 池中实例的最长保留时间（秒），None 表示不过期
+        self._items = deque()       # (restored_at, item)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+        self.hits = 0
+        self.waited_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.refills = 0
+        self.refill_failures = 0
+
+    def start(self):
+        if self.size <= 0 or self._thread is not None:
+            return
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._refill_loop, name=f"warm-pool-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _drop_expired(self):
+        if self.max_age is None:
+            return
+        now = time.monotonic()
+        while self._items and now - self._items[0][0] > self.max_age:
+            self._items.popleft()
+            self.expired += 1
+
+    def _refill_loop(self):
+        while True:
+            with self._cond:
+                self._drop_expired()
+                while not self._stopped and len(self._items) >= self.size:
+                    self._cond.wait(timeout=self.max_age)
+                    self._drop_expired()
+                if self._stopped:
+                    return
+                item = self.produce()
+                self._items.append((time.monotonic(), item))
+
+            # 一次只补充一个：等这次恢复结束再看是否还缺
+            ok = item.wait()
+            with self._cond:
+                if ok:
+                    self.refills += 1
+                else:
+                    self.refill_failures += 1
+                    self._remove(item)
+            if not ok:
+                print(f"预恢复失败（{self.name}）: {item.error}")
+                time.sleep(1.0)  # 失败后稍等再试，避免空转
+
+    def _remove(self, item):
+        for entry in self._items:
+            if entry[1] is item:
+                self._items.remove(entry)
+                return
+
+    def acquire(self, cold=None):
+        """取走池中最早的实例（可能仍在恢复中）；池为空时返回 cold()（默认为 produce()）"""
+        with self._cond:
+            self._drop_expired()
+            while self._items:
+                _, item = self._items.popleft()
+                if item.failed:
+                    continue
+                if item.done:
+                    self.hits += 1
+                else:
+                    self.waited_hits += 1
+                self._cond.notify_all()
+                return item
+            self.misses += 1
+            self._cond.notify_all()
+        return (cold or self.produce)()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "name": self.name,
+                "size": self.size,
+                "ready": sum(1 for _, item in self._items if item.done),
+                "restoring": sum(1 for _, item in self._items if not item.done),
+                "hits": self.hits,                  # 取到已恢复好的实例，无需等待
+                "waited_hits": self.waited_hits,    # 取到仍在恢复的实例，还需等待
+                "misses": self.misses,              # 池为空，冷恢复
+                "expired": self.expired,
+                "refills": self.refills,
+                "refill_failures": self.refill_failures,
+            }